@@ -4,13 +4,30 @@ https://github.com/psieg/Lightpack
 """
 import asyncio
 from homeassistant.config_entries import SOURCE_IMPORT
-from homeassistant.const import Platform
-from .const import DOMAIN
+from homeassistant.const import (
+    CONF_API_KEY,
+    CONF_HOST,
+    CONF_PORT,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
+from .const import DATA_REGISTRY, DOMAIN
 
-PLATFORMS = [Platform.LIGHT]
+PLATFORMS = [Platform.LIGHT, Platform.SENSOR]
 
 async def async_setup(hass, config):
     """Set up the Prismatik integration."""
+
+    async def async_close_clients(event):  # pylint: disable=unused-argument
+        # client modules are only loaded once an entry is set up
+        registry = hass.data.get(DOMAIN, {}).get(DATA_REGISTRY)
+        if registry is not None:
+            await registry.async_close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_clients)
+
     conf = config.get(DOMAIN)
     if conf is not None:
         hass.async_create_task(
@@ -33,6 +50,21 @@ async def async_setup_entry(hass, entry):
     if entry.options:
         hass.config_entries.async_update_entry(entry, data=config, options={})
 
+    if not er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id):
+        # nothing to restore yet, wait until Prismatik answers at least once
+        from .registry import get_registry  # pylint: disable=import-outside-toplevel
+
+        registry = get_registry(hass)
+        client = await registry.async_acquire(
+            config[CONF_HOST], config[CONF_PORT], config.get(CONF_API_KEY)
+        )
+        try:
+            await client.is_on()
+            if not client.is_reachable:
+                raise ConfigEntryNotReady(f"Prismatik at {config[CONF_HOST]} is not reachable")
+        finally:
+            registry.release(client)
+
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = config
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
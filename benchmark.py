@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+"""Benchmark PrismatikClient against the test server emulator"""
+import argparse
+import ast
+import asyncio
+import gc
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from typing import Any, Awaitable, Callable, Dict, List
+
+from test_server import LOCAL_IP, PrismatikEmulator
+
+BENCH_PORT = 3737
+# client modules, on top of what Home Assistant already imported
+IMPORT_BUDGET_MS = 30
+# rendering one frame, out of 16.7ms per frame at 60 FPS
+EFFECT_BUDGET_MS = 1
+IMPORT_MODULES = ("protocol", "prismatik", "watcher", "transition", "coalescer", "effects")
+# loaded by Home Assistant at boot and for every config flow, before any setup
+EAGER_MODULES = ("__init__", "config_flow")
+# run at every boot, even without any config entry
+EAGER_FUNCTIONS = ("async_setup",)
+LIGHTWEIGHT_MODULES = ("const",)
+_IMPORT_PROBE = """
+import asyncio, dataclasses, enum, logging, sys, time, types, typing
+sys.path.insert(0, {root!r})
+import benchmark
+start = time.perf_counter()
+for name in {modules!r}:
+    benchmark.client_module(name)
+print(time.perf_counter() - start)
+"""
+
+
+def load_client_modules(package: str = "prismatik_bench") -> types.ModuleType:
+    """Import the client package without its Home Assistant glue (__init__.py)."""
+    if package not in sys.modules:
+        module = types.ModuleType(package)
+        module.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+        sys.modules[package] = module
+    return sys.modules[package]
+
+
+def client_module(name: str, package: str = "prismatik_bench") -> types.ModuleType:
+    """Client side module (prismatik, frames...)."""
+    load_client_modules(package)
+    return importlib.import_module(f"{package}.{name}")
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in ms."""
+    ordered = sorted(samples)
+
+    def pick(ratio: float) -> float:
+        return ordered[min(int(ratio * len(ordered)), len(ordered) - 1)] * 1000
+
+    return {
+        "p50": round(pick(0.50), 3),
+        "p90": round(pick(0.90), 3),
+        "p99": round(pick(0.99), 3),
+        "max": round(ordered[-1] * 1000, 3),
+        "mean": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+async def timed(calls: int, call: Callable[[], Awaitable[Any]]) -> List[float]:
+    """Run call sequentially, return each duration."""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_latency(client, calls: int) -> Dict[str, Any]:
+    """Per-command latency percentiles."""
+    return {
+        "getstatus": percentiles(await timed(calls, client.is_on)),
+        "get_state": percentiles(await timed(calls, client.get_state)),
+        "set_color": percentiles(await timed(calls, lambda: client.set_color((1, 2, 3)))),
+    }
+
+
+async def bench_updates(client, duration: float, concurrency: int) -> Dict[str, Any]:
+    """get_state() snapshots per second with concurrent callers."""
+    done = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            await client.get_state()
+            done += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"concurrency": concurrency, "updates_per_second": round(done / (time.perf_counter() - start), 1)}
+
+
+async def bench_frames(client, leds: int, frames: int) -> Dict[str, Any]:
+    """setcolor throughput, full frames and small deltas."""
+    full = [bytes([idx % 256, (idx * 3) % 256, 255 - idx % 256]) * leds for idx in range(frames)]
+    start = time.perf_counter()
+    for frame in full:
+        await client.set_frame(frame)
+    full_fps = frames / (time.perf_counter() - start)
+
+    delta = []
+    frame = bytearray(full[0])
+    for idx in range(frames):
+        pixel = (idx % leds) * 3
+        frame[pixel] = (frame[pixel] + 1) % 256
+        delta.append(bytes(frame))
+    start = time.perf_counter()
+    for frame in delta:
+        await client.set_frame(frame)
+    delta_fps = frames / (time.perf_counter() - start)
+    return {"leds": leds, "full_fps": round(full_fps, 1), "delta_fps": round(delta_fps, 1)}
+
+
+def bench_codec(leds: int, calls: int) -> Dict[str, Any]:
+    """getcolors answer parsing, first LED and every LED."""
+    protocol = client_module("protocol")
+    pixels = PrismatikEmulator(leds=leds).getcolors().strip().partition(":")[2]
+    start = time.perf_counter()
+    for _ in range(calls):
+        protocol.parse_color(pixels)
+    first_us = (time.perf_counter() - start) / calls * 1e6
+    start = time.perf_counter()
+    for _ in range(calls):
+        protocol.parse_colors(pixels)
+    all_us = (time.perf_counter() - start) / calls * 1e6
+    return {"leds": leds, "parse_color_us": round(first_us, 2), "parse_colors_us": round(all_us, 2)}
+
+
+def bench_effects(leds: int, frames: int) -> Dict[str, Any]:
+    """Frame rendering time of each built-in effect."""
+    effects = client_module("effects")
+    results: Dict[str, Any] = {"leds": leds, "budget_ms": EFFECT_BUDGET_MS}
+    for name, effect_factory in effects.EFFECTS.items():
+        effect = effect_factory([(255, 120, 40)])
+        effect.render(0, leds)
+        start = time.perf_counter()
+        for idx in range(frames):
+            effect.render(idx / 60, leds)
+        results[name] = round((time.perf_counter() - start) / frames * 1000, 4)
+    results["within_budget"] = all(
+        results[name] <= EFFECT_BUDGET_MS for name in effects.EFFECTS
+    )
+    return results
+
+
+def bench_imports(runs: int) -> Dict[str, Any]:
+    """Cold import time of the client modules, each run in a fresh interpreter."""
+    probe = _IMPORT_PROBE.format(
+        root=os.path.dirname(os.path.abspath(__file__)), modules=IMPORT_MODULES
+    )
+    samples = [
+        float(subprocess.run(
+            [sys.executable, "-c", probe], check=True, capture_output=True, text=True
+        ).stdout)
+        for _ in range(runs)
+    ]
+    median_ms = statistics.median(samples) * 1000
+    return {
+        "modules": list(IMPORT_MODULES),
+        "median_ms": round(median_ms, 2),
+        "budget_ms": IMPORT_BUDGET_MS,
+        "within_budget": median_ms <= IMPORT_BUDGET_MS,
+    }
+
+
+def check_eager_imports() -> Dict[str, List[str]]:
+    """Package modules imported by what Home Assistant loads or runs eagerly.
+
+    Anything besides constants should be imported inside the entry setup.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    heavy = {}
+    for name in EAGER_MODULES:
+        with open(os.path.join(root, f"{name}.py"), encoding="utf-8") as source:
+            tree = ast.parse(source.read())
+        nodes = list(tree.body)
+        for node in tree.body:
+            if isinstance(node, ast.AsyncFunctionDef) and node.name in EAGER_FUNCTIONS:
+                nodes.extend(ast.walk(node))
+        imported = [
+            node.module or ""
+            for node in nodes
+            if isinstance(node, ast.ImportFrom) and node.level > 0
+        ]
+        heavy[name] = [module for module in imported if module not in LIGHTWEIGHT_MODULES]
+    return heavy
+
+
+async def bench_group(prismatik, args: argparse.Namespace) -> Dict[str, Any]:
+    """Latency and spread of synchronized group writes, per group size.
+
+    Each member has its own emulator, like separate PCs each running Prismatik.
+    """
+    group = client_module("group")
+    snapshot = client_module("snapshot").PrismatikSnapshot(
+        True, None, None, 80, bytes((255, 128, 0)) * args.leds
+    )
+    results = {}
+    for size in args.group:
+        ports = range(BENCH_PORT + 1, BENCH_PORT + 1 + size)
+        servers = [
+            await PrismatikEmulator(
+                leds=args.leds,
+                latency=args.latency / 1000,
+                jitter=args.jitter / 1000,
+            ).start(LOCAL_IP, port)
+            for port in ports
+        ]
+        clients = [prismatik.PrismatikClient(LOCAL_IP, port, None) for port in ports]
+        await asyncio.gather(*(client.get_state() for client in clients))
+        writes = [
+            group.GroupWrite(str(index), client, snapshot, client.snapshot_requests(snapshot))
+            for index, client in enumerate(clients)
+        ]
+        report = group.group_report(await group.async_send_together(writes))
+        results[size] = {"latency_ms": report["latency_ms"], "spread_ms": report["spread_ms"]}
+        for client in clients:
+            await client.close()
+        for server in servers:
+            server.close()
+    return results
+
+
+async def bench_memory(prismatik, connections: int) -> Dict[str, Any]:
+    """Memory allocated per connected client."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    clients = [prismatik.PrismatikClient(LOCAL_IP, BENCH_PORT, None) for _ in range(connections)]
+    await asyncio.gather(*(client.get_state() for client in clients))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    for client in clients:
+        await client.close()
+    return {"connections": connections, "bytes_per_connection": allocated // connections}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run all benchmarks."""
+    prismatik = client_module("prismatik")
+    emulator = PrismatikEmulator(
+        leds=args.leds,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+    )
+    server = await emulator.start(LOCAL_IP, BENCH_PORT)
+    results: Dict[str, Any] = {"latency_ms": args.latency, "jitter_ms": args.jitter}
+    async with server:
+        client = prismatik.PrismatikClient(LOCAL_IP, BENCH_PORT, None)
+        results["commands"] = await bench_latency(client, args.calls)
+        results["updates"] = await bench_updates(client, args.duration, args.concurrency)
+        results["frames"] = await bench_frames(client, args.leds, args.frames)
+        await client.close()
+        results["group"] = await bench_group(prismatik, args)
+        results["memory"] = await bench_memory(prismatik, args.connections)
+    results["codec"] = bench_codec(args.leds, args.calls)
+    results["effects_ms"] = bench_effects(args.leds, args.frames)
+    results["imports"] = bench_imports(args.import_runs)
+    results["imports"]["eager"] = check_eager_imports()
+    return results
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--leds", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0, help="server answer delay in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random extra delay in ms")
+    parser.add_argument("--calls", type=int, default=200, help="calls per latency benchmark")
+    parser.add_argument("--duration", type=float, default=2, help="seconds of update benchmark")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--connections", type=int, default=20)
+    parser.add_argument(
+        "--group",
+        type=lambda sizes: [int(size) for size in sizes.split(",")],
+        default=[1, 4, 16],
+        help="group sizes of synchronized writes",
+    )
+    parser.add_argument("--import-runs", type=int, default=5, help="fresh interpreters timing imports")
+    parser.add_argument("--output", help="also write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+    if not results["effects_ms"]["within_budget"]:
+        sys.exit(f"effect rendering is over {EFFECT_BUDGET_MS}ms per frame")
+    eager = {name: modules for name, modules in results["imports"]["eager"].items() if modules}
+    if eager:
+        sys.exit(f"client modules imported at Home Assistant boot: {eager}")
+    if not results["imports"]["within_budget"]:
+        sys.exit(f"client imports took {results['imports']['median_ms']}ms, budget is {IMPORT_BUDGET_MS}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Prismatik command coalescing"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .const import DEFAULT_COMMAND_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+Target = Dict[str, Any]
+
+
+def merge_targets(pending: Target, target: Target) -> Target:
+    """Newer attributes replace pending ones."""
+    return {**pending, **target}
+
+
+class CommandCoalescer:
+    """Write only the latest target state, at most once per interval.
+
+    Targets submitted while a write is in progress or too recent are merged
+    into one pending target, every submitter waits for the write covering it.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Target], Awaitable[None]],
+        interval: float = DEFAULT_COMMAND_INTERVAL,
+        merge: Callable[[Target, Target], Target] = merge_targets,
+    ) -> None:
+        """Intialize."""
+        self._write = write
+        self._interval = interval
+        self._merge = merge
+        self._target: Optional[Target] = None
+        self._waiters: List[asyncio.Future] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_write: Optional[float] = None
+        self.writes = 0
+        self.merged = 0
+
+    async def submit(self, target: Target) -> None:
+        """Queue target state, returns once it has been written."""
+        loop = asyncio.get_running_loop()
+        if self._target is None:
+            self._target = dict(target)
+        else:
+            self._target = self._merge(self._target, target)
+            self.merged += 1
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        await waiter
+
+    async def async_cancel(self) -> None:
+        """Drop the pending target and wait for the write in progress."""
+        self._target = None
+        self._resolve(self._waiters)
+        self._waiters = []
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    @staticmethod
+    def _resolve(waiters: List[asyncio.Future], err: Optional[Exception] = None) -> None:
+        """Wake up submitters."""
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if err is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(err)
+
+    async def _run(self) -> None:
+        """Write pending targets until there are none left."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if self._last_write is not None:
+                    delay = self._last_write + self._interval - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if self._target is None:
+                    return
+                target, self._target = self._target, None
+                waiters, self._waiters = self._waiters, []
+                self._last_write = loop.time()
+                self.writes += 1
+                try:
+                    await self._write(target)
+                except Exception as err:  # pylint: disable=broad-except
+                    self._resolve(waiters, err)
+                else:
+                    self._resolve(waiters)
+        finally:
+            self._task = None
@@ -12,35 +12,62 @@ from homeassistant.const import (
 from homeassistant.core import callback
 
 from .const import (
+    CONF_GAMMA,
+    CONF_NETWORK,
+    CONF_PORTS,
+    CONF_SEGMENTS,
+    CONF_SERVER,
+    CONF_WHITE_BALANCE,
+    DEFAULT_GAMMA,
     DEFAULT_NAME,
     DEFAULT_PORT,
     DEFAULT_PROFILE_NAME,
+    DEFAULT_WHITE_BALANCE,
     DOMAIN
 )
 
-from .light import PrismatikClient
 
-
-async def validate_input(data):
+async def validate_input(hass, data):
     """Validate the user input allows us to connect.
 
     Data has the keys from DATA_SCHEMA with values provided by the user.
+    The connection is kept in the registry for the entry being set up.
     """
-    client = PrismatikClient(
+    # client modules are only needed once the user submits the form
+    # pylint: disable=import-outside-toplevel
+    from .frames import parse_segments
+    from .pipeline import parse_balance
+    from .registry import get_registry
+
+    try:
+        parse_segments(data.get(CONF_SEGMENTS) or "")
+    except ValueError as err:
+        raise InvalidSegments from err
+    try:
+        parse_balance(data.get(CONF_WHITE_BALANCE) or DEFAULT_WHITE_BALANCE)
+    except ValueError as err:
+        raise InvalidWhiteBalance from err
+    registry = get_registry(hass)
+    client = await registry.async_acquire(
         data[CONF_HOST],
         data[CONF_PORT],
         data[CONF_API_KEY]
     )
-    await client.is_on()
-    if not client.is_reachable:
-        raise CannotConnect
-    if not client.is_connected:
-        raise InvalidApiKey
+    try:
+        await client.is_on()
+        if not client.is_reachable:
+            raise CannotConnect
+        if not client.is_connected:
+            raise InvalidApiKey
+    finally:
+        registry.release(client)
 
 
 class PrismatikFlow: # pylint: disable=too-few-public-methods
     """Prismatik Flow."""
 
+    _form_step_id = "user"
+
     def __init__(self):
         """Init."""
         self._host = None
@@ -48,6 +75,9 @@ class PrismatikFlow: # pylint: disable=too-few-public-methods
         self._name = DEFAULT_NAME
         self._profile_name = DEFAULT_PROFILE_NAME
         self._apikey = ""
+        self._segments = ""
+        self._gamma = DEFAULT_GAMMA
+        self._white_balance = DEFAULT_WHITE_BALANCE
         self._is_import = False
 
     async def async_step_user(self, user_input=None):
@@ -59,8 +89,11 @@ class PrismatikFlow: # pylint: disable=too-few-public-methods
             self._name = str(user_input[CONF_NAME])
             self._profile_name = str(user_input[CONF_PROFILE_NAME])
             self._apikey = str(user_input[CONF_API_KEY])
+            self._segments = str(user_input.get(CONF_SEGMENTS) or "")
+            self._gamma = float(user_input.get(CONF_GAMMA, DEFAULT_GAMMA))
+            self._white_balance = str(user_input.get(CONF_WHITE_BALANCE) or DEFAULT_WHITE_BALANCE)
             try:
-                await validate_input(user_input)
+                await validate_input(self.hass, user_input)
 
                 # host = self._host.replace(".", "_")
                 # await self.async_set_unique_id(f"{host}_{self._port}")
@@ -71,6 +104,10 @@ class PrismatikFlow: # pylint: disable=too-few-public-methods
                 errors["base"] = "cannot_connect"
             except InvalidApiKey:
                 errors["base"] = "invalid_api_key"
+            except InvalidSegments:
+                errors[CONF_SEGMENTS] = "invalid_segments"
+            except InvalidWhiteBalance:
+                errors[CONF_WHITE_BALANCE] = "invalid_white_balance"
             except Exception:  # pylint: disable=broad-except
                 errors["base"] = "unknown"
 
@@ -80,11 +117,16 @@ class PrismatikFlow: # pylint: disable=too-few-public-methods
                 vol.Optional(CONF_PORT, default=self._port): int,
                 vol.Optional(CONF_API_KEY, default=self._apikey): str,
                 vol.Optional(CONF_NAME, default=self._name): str,
-                vol.Optional(CONF_PROFILE_NAME, default=self._profile_name): str
+                vol.Optional(CONF_PROFILE_NAME, default=self._profile_name): str,
+                vol.Optional(CONF_SEGMENTS, default=self._segments): str,
+                vol.Optional(CONF_GAMMA, default=self._gamma): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.1, max=5)
+                ),
+                vol.Optional(CONF_WHITE_BALANCE, default=self._white_balance): str
             }
         )
         return self._async_show_form(
-            step_id="user", data_schema=data_schema, errors=errors
+            step_id=self._form_step_id, data_schema=data_schema, errors=errors
         )
 
     def _async_create_entry(self, title, data):
@@ -101,10 +143,76 @@ class PrismatikConfigFlow(PrismatikFlow, config_entries.ConfigFlow, domain=DOMAI
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
+    _form_step_id = "manual"
+
+    def __init__(self):
+        """Init."""
+        super().__init__()
+        self._network = ""
+        self._ports = DEFAULT_PORT
+        self._servers = {}
+
+    async def async_step_user(self, user_input=None):
+        """Enter the host or look for it."""
+        if user_input is None:
+            return self.async_show_menu(step_id="user", menu_options=["manual", "discover"])
+        return await PrismatikFlow.async_step_user(self, user_input)
+
+    async def async_step_manual(self, user_input=None):
+        """Handle the connection details."""
+        return await PrismatikFlow.async_step_user(self, user_input)
+
+    async def async_step_discover(self, user_input=None):
+        """Scan a network for Prismatik API servers."""
+        # pylint: disable=import-outside-toplevel
+        from .discovery import async_discover, parse_ports
+
+        errors = {}
+        if user_input is not None:
+            self._network = user_input[CONF_NETWORK]
+            self._ports = user_input[CONF_PORTS]
+            try:
+                servers = await async_discover(self._network, parse_ports(self._ports))
+            except ValueError:
+                errors["base"] = "invalid_network"
+            else:
+                self._servers = {
+                    f"{server.host}:{server.port}": server for server in servers
+                }
+                if self._servers:
+                    return await self.async_step_pick()
+                errors["base"] = "no_devices_found"
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_NETWORK, default=self._network): str,
+                vol.Optional(CONF_PORTS, default=self._ports): str,
+            }
+        )
+        return self.async_show_form(step_id="discover", data_schema=data_schema, errors=errors)
+
+    async def async_step_pick(self, user_input=None):
+        """Pick one of the discovered servers."""
+        if user_input is not None:
+            server = self._servers[user_input[CONF_SERVER]]
+            self._host = server.host
+            self._port = server.port
+            return await self.async_step_manual()
+
+        choices = {}
+        for key, server in self._servers.items():
+            if server.auth_required:
+                details = "API key required"
+            else:
+                details = f"{server.leds} LEDs, {len(server.profiles or [])} profiles"
+            choices[key] = f"{key} ({details})"
+        data_schema = vol.Schema({vol.Required(CONF_SERVER): vol.In(choices)})
+        return self.async_show_form(step_id="pick", data_schema=data_schema)
+
     async def async_step_import(self, user_input=None):
         """Handle configuration by yaml file."""
         self._is_import = True
-        return await self.async_step_user(user_input)
+        return await PrismatikFlow.async_step_user(self, user_input)
 
     def _async_create_entry(self, title, data):
         return self.async_create_entry(title=title, data=data)
@@ -129,6 +237,9 @@ class PrismatikOptionsFlowHandler(PrismatikFlow, config_entries.OptionsFlow):
         self._name = config_entry.data[CONF_NAME] if CONF_NAME in config_entry.data else DEFAULT_NAME
         self._profile_name = config_entry.data[CONF_PROFILE_NAME] if CONF_PROFILE_NAME in config_entry.data else DEFAULT_PROFILE_NAME
         self._apikey = config_entry.data[CONF_API_KEY] if CONF_API_KEY in config_entry.data else ""
+        self._segments = config_entry.options.get(CONF_SEGMENTS, config_entry.data.get(CONF_SEGMENTS, ""))
+        self._gamma = config_entry.data.get(CONF_GAMMA, DEFAULT_GAMMA)
+        self._white_balance = config_entry.data.get(CONF_WHITE_BALANCE, DEFAULT_WHITE_BALANCE)
 
     async def async_step_init(self, user_input=None):  # pylint: disable=unused-argument
         """Manage the options."""
@@ -147,3 +258,11 @@ class CannotConnect(exceptions.HomeAssistantError): # pylint: disable=too-few-pu
 
 class InvalidApiKey(exceptions.HomeAssistantError): # pylint: disable=too-few-public-methods
     """Error to indicate there is invalid API Key."""
+
+
+class InvalidSegments(exceptions.HomeAssistantError): # pylint: disable=too-few-public-methods
+    """Error to indicate segments can not be parsed."""
+
+
+class InvalidWhiteBalance(exceptions.HomeAssistantError): # pylint: disable=too-few-public-methods
+    """Error to indicate white balance can not be parsed."""
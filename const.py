@@ -1,9 +1,74 @@
 """Constants for the Prismatik integration."""
 
+ATTR_COLORS = "colors"
+ATTR_FPS = "fps"
+ATTR_FRAME = "frame"
+ATTR_FRAMES_DROPPED = "frames_dropped"
+ATTR_FRAMES_SENT = "frames_sent"
+ATTR_INTERVAL = "interval"
+ATTR_LEDS = "leds"
+ATTR_MIN_DELTA = "min_delta"
+ATTR_TARGETS = "targets"
+ATTR_ZONES = "zones"
+BACKOFF_BASE = 1
+BACKOFF_JITTER = 0.2
+BACKOFF_MAX = 300
+CACHE_TTL = 300
+CANDLE_INTERVAL = 0.1
+CLIENT_IDLE_TIMEOUT = 60
+COMPOSER_FLUSH_DELAY = 0.02
+CONF_COMMAND_INTERVAL = "command_interval"
+CONF_GAMMA = "gamma"
+CONF_NETWORK = "network"
+CONF_PORTS = "ports"
+CONF_SEGMENTS = "segments"
+CONF_SERVER = "server"
+CONF_WHITE_BALANCE = "white_balance"
+CONNECT_TIMEOUT = 5
 CONNECTION_RETRY_ERRORS = 5
+DATA_REGISTRY = "registry"
+DEFAULT_COMMAND_INTERVAL = 0.1
+DEFAULT_EFFECT_FPS = 30
+DEFAULT_GAMMA = 1.0
 DEFAULT_ICON_OFF = "mdi:string-lights-off"
 DEFAULT_ICON_ON = "mdi:string-lights"
+DEFAULT_MIRROR_INTERVAL = 0.2
+DEFAULT_MIRROR_MIN_DELTA = 8
 DEFAULT_NAME = "Prismatik"
 DEFAULT_PORT = "3636"
 DEFAULT_PROFILE_NAME = "hass"
+DEFAULT_SNAPSHOT = "default"
+DEFAULT_STREAM_FPS = 30
+DEFAULT_WHITE_BALANCE = "1,1,1"
+DELTA_MAX_RATIO = 0.5
+DISCOVERY_CONCURRENCY = 128
+DISCOVERY_MAX_HOSTS = 4096
+DISCOVERY_TIMEOUT = 0.5
 DOMAIN = "prismatik"
+EFFECT_BREATHE = "breathe"
+EFFECT_CANDLE = "candle"
+EFFECT_CHASE = "chase"
+EFFECT_GRADIENT = "gradient"
+EFFECT_RAINBOW = "rainbow"
+GROUP_START_MARGIN = 0.01
+LATENCY_SMOOTHING = 0.2
+LOCK_IDLE_TIMEOUT = 1
+METRICS_LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+READ_TIMEOUT = 5
+SEND_RETRY_PASSES = 3
+SERVICE_EFFECT_START = "effect_start"
+SERVICE_GROUP_SET = "group_set"
+SERVICE_MIRROR_START = "mirror_start"
+SERVICE_MIRROR_STOP = "mirror_stop"
+SERVICE_SNAPSHOT_RESTORE = "snapshot_restore"
+SERVICE_SNAPSHOT_SAVE = "snapshot_save"
+SERVICE_STREAM_FRAME = "stream_frame"
+SERVICE_STREAM_STOP = "stream_stop"
+STREAM_MAX_IN_FLIGHT = 2
+STREAM_MAX_WRITE_BUFFER = 64 * 1024
+TRANSITION_LATENCY_FACTOR = 2
+TRANSITION_MAX_STEP = 0.5
+TRANSITION_MIN_STEP = 1 / 30
+WATCH_BACKOFF = 1.5
+WATCH_MAX_INTERVAL = 30
+WATCH_MIN_INTERVAL = 1
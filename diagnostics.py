@@ -0,0 +1,42 @@
+"""Diagnostics support for Prismatik."""
+from dataclasses import asdict
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .registry import get_registry
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Connection health, lock session and client metrics of a config entry."""
+    config = hass.data[DOMAIN][entry.entry_id]
+    registry = get_registry(hass)
+    diagnostics: Dict[str, Any] = {"config": async_redact_data(config, TO_REDACT)}
+    client = registry.get(config[CONF_HOST], config[CONF_PORT])
+    if client is None:
+        return diagnostics
+    watcher = registry.watcher(client)
+    state = asdict(watcher.state) if watcher.state is not None else None
+    if state is not None and state["colors"] is not None:
+        state["colors"] = state["colors"].tolist()
+    diagnostics.update(
+        {
+            "header": client.header,
+            "connection": client.connection_stats,
+            "lock": client.lock_stats,
+            "profile_state": client.profile_state,
+            "queue_depth": client.queue_depth,
+            "watch_interval": watcher.interval,
+            "state": state,
+            "metrics": client.metrics.as_dict(),
+        }
+    )
+    return diagnostics
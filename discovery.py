@@ -0,0 +1,98 @@
+"""Prismatik API server discovery"""
+
+import asyncio
+import ipaddress
+import logging
+from typing import List, NamedTuple, Optional, Sequence
+
+from .const import DISCOVERY_CONCURRENCY, DISCOVERY_MAX_HOSTS, DISCOVERY_TIMEOUT
+from .protocol import (
+    AWR_AUTH_REQ,
+    AWR_HEADER,
+    PrismatikAPI,
+    get_request,
+    parse_leds,
+    parse_profiles,
+    parse_value,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DiscoveredServer(NamedTuple):
+    """Prismatik API server answering on host:port."""
+
+    host: str
+    port: int
+    header: str
+    leds: Optional[int]
+    profiles: Optional[List[str]]
+    auth_required: bool
+
+
+async def _probe(host: str, port: int, timeout: float) -> Optional[DiscoveredServer]:
+    """Check host:port for a Prismatik API header, then ask LED count and profiles."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        header = (await asyncio.wait_for(reader.readline(), timeout)).decode().strip()
+        if not header.startswith(AWR_HEADER):
+            return None
+        # both questions in one write, answers come back in order
+        writer.write(
+            (get_request(PrismatikAPI.CMD_GET_COUNTLEDS) + get_request(PrismatikAPI.CMD_GET_PROFILES)).encode()
+        )
+        countleds = (await asyncio.wait_for(reader.readline(), timeout)).decode().strip()
+        profiles = (await asyncio.wait_for(reader.readline(), timeout)).decode().strip()
+    except (OSError, UnicodeDecodeError, asyncio.TimeoutError):
+        return None
+    finally:
+        writer.close()
+    if countleds == AWR_AUTH_REQ:
+        return DiscoveredServer(host, port, header, None, None, True)
+    leds = parse_value(PrismatikAPI.CMD_GET_COUNTLEDS, countleds)
+    return DiscoveredServer(
+        host,
+        port,
+        header,
+        parse_leds(leds) if leds and leds.isdigit() else None,
+        parse_profiles(parse_value(PrismatikAPI.CMD_GET_PROFILES, profiles)),
+        False,
+    )
+
+
+def parse_ports(ports: str) -> List[int]:
+    """Port list from `3636,3637`."""
+    parsed = []
+    for port in filter(None, (port.strip() for port in ports.split(","))):
+        if not port.isdigit() or not 0 < int(port) < 65536:
+            raise ValueError(f"Invalid port: {port}")
+        parsed.append(int(port))
+    if not parsed:
+        raise ValueError("No port")
+    return parsed
+
+
+async def async_discover(
+    network: str,
+    ports: Sequence[int],
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> List[DiscoveredServer]:
+    """Probe every host of a CIDR network on each port, a few at a time."""
+    subnet = ipaddress.ip_network(network, strict=False)
+    if subnet.num_addresses * len(ports) > DISCOVERY_MAX_HOSTS:
+        raise ValueError(f"{network} is too large to scan")
+    hosts = [str(host) for host in subnet.hosts()] or [str(subnet.network_address)]
+    slots = asyncio.Semaphore(concurrency)
+
+    async def probe(host: str, port: int) -> Optional[DiscoveredServer]:
+        async with slots:
+            return await _probe(host, port, timeout)
+
+    found = await asyncio.gather(*(probe(host, port) for host in hosts for port in ports))
+    servers = [server for server in found if server is not None]
+    _LOGGER.debug("Found %d Prismatik servers in %s", len(servers), network)
+    return servers
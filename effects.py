@@ -0,0 +1,234 @@
+"""Prismatik client-side effects"""
+
+import asyncio
+import colorsys
+import math
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Tuple
+
+from .const import (
+    CANDLE_INTERVAL,
+    DEFAULT_EFFECT_FPS,
+    EFFECT_BREATHE,
+    EFFECT_CANDLE,
+    EFFECT_CHASE,
+    EFFECT_GRADIENT,
+    EFFECT_RAINBOW,
+)
+from .frames import FrameStream
+from .pipeline import scale_table
+
+if TYPE_CHECKING:
+    from .prismatik import PrismatikClient
+
+RGB = Tuple[int, int, int]
+
+# whole frames are built from precomputed byte strings with slicing, repetition
+# and bytes.translate(), which run in C, per-LED Python loops only happen when
+# an effect is set up for a LED count
+
+
+@lru_cache(maxsize=1)
+def _wheel() -> Tuple[RGB, ...]:
+    """Fully saturated colors for 256 hues."""
+    return tuple(
+        tuple(round(channel * 255) for channel in colorsys.hsv_to_rgb(hue / 256, 1, 1))
+        for hue in range(256)
+    )
+
+
+def _blend(start: RGB, end: RGB, progress: float) -> RGB:
+    """Color between start and end."""
+    return tuple(round(a + (b - a) * progress) for a, b in zip(start, end))
+
+
+def _rotate(strip: bytes, leds: int, offset: int) -> bytes:
+    """leds LEDs of a doubled strip starting at offset."""
+    return strip[offset * 3:(offset + leds) * 3]
+
+
+class Effect(ABC):
+    """Frame generator, render() gets the elapsed time in seconds."""
+
+    @abstractmethod
+    def render(self, elapsed: float, leds: int) -> bytes:
+        """Frame of leds (R,G,B) at elapsed seconds."""
+
+
+class Rainbow(Effect):
+    """Hue wheel spread over the strip, rotating."""
+
+    def __init__(self, speed: float = 0.2) -> None:
+        """Intialize."""
+        self._speed = speed
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def _strip(leds: int) -> bytes:
+        wheel = _wheel()
+        strip = bytes(channel for led in range(leds) for channel in wheel[led * 256 // leds])
+        return strip * 2
+
+    def render(self, elapsed: float, leds: int) -> bytes:
+        """Frame of leds (R,G,B) at elapsed seconds."""
+        return _rotate(self._strip(leds), leds, int(elapsed * self._speed * leds) % leds)
+
+
+class Breathe(Effect):
+    """Whole strip fading in and out."""
+
+    def __init__(self, color: RGB, period: float = 4.0) -> None:
+        """Intialize."""
+        self._color = bytes(color)
+        self._period = period
+
+    def render(self, elapsed: float, leds: int) -> bytes:
+        """Frame of leds (R,G,B) at elapsed seconds."""
+        level = round(255 * (0.55 - 0.45 * math.cos(2 * math.pi * elapsed / self._period)))
+        return (self._color * leds).translate(scale_table(level))
+
+
+class Chase(Effect):
+    """Lit blocks running along the strip."""
+
+    def __init__(self, color: RGB, width: int = 3, gap: int = 7, speed: float = 20) -> None:
+        """Intialize."""
+        self._period = width + gap
+        self._unit = bytes(color) * width + bytes(3 * gap)
+        self._speed = speed
+
+    def render(self, elapsed: float, leds: int) -> bytes:
+        """Frame of leds (R,G,B) at elapsed seconds."""
+        strip = self._unit * (leds // self._period + 2)
+        return _rotate(strip, leds, int(elapsed * self._speed) % self._period)
+
+
+class Gradient(Effect):
+    """Color stops blended along the strip, scrolling when speed is set."""
+
+    def __init__(self, stops: Sequence[RGB], speed: float = 0.0) -> None:
+        """Intialize."""
+        # loop back to the first color so scrolling has no seam
+        self._stops = tuple(stops) + (tuple(stops[0]),)
+        self._speed = speed
+        self._strips: Dict[int, bytes] = {}
+
+    def _strip(self, leds: int) -> bytes:
+        strip = self._strips.get(leds)
+        if strip is None:
+            segments = len(self._stops) - 1
+            colors = []
+            for led in range(leds):
+                position = led * segments / leds
+                index = int(position)
+                colors.extend(_blend(self._stops[index], self._stops[index + 1], position - index))
+            strip = self._strips[leds] = bytes(colors) * 2
+        return strip
+
+    def render(self, elapsed: float, leds: int) -> bytes:
+        """Frame of leds (R,G,B) at elapsed seconds."""
+        return _rotate(self._strip(leds), leds, int(elapsed * self._speed * leds) % leds)
+
+
+class Candle(Effect):
+    """Random per-LED flicker around a warm color."""
+
+    # random byte to brightness level, mostly bright with a few dips
+    _LEVELS = bytes(255 - (value * value) // 600 for value in range(256))
+
+    def __init__(self, color: RGB = (255, 147, 41), interval: float = CANDLE_INTERVAL) -> None:
+        """Intialize."""
+        self._channels = tuple(scale_table(channel) for channel in color)
+        self._interval = interval
+        self._step: Optional[int] = None
+        self._frame = b""
+
+    def render(self, elapsed: float, leds: int) -> bytes:
+        """Frame of leds (R,G,B) at elapsed seconds."""
+        step = int(elapsed / self._interval)
+        if step != self._step or len(self._frame) != leds * 3:
+            self._step = step
+            levels = os.urandom(leds).translate(self._LEVELS)
+            frame = bytearray(leds * 3)
+            for channel, table in enumerate(self._channels):
+                # level * channel / 255, the scale table is symmetric
+                frame[channel::3] = levels.translate(table)
+            self._frame = bytes(frame)
+        return self._frame
+
+
+def _complement(color: RGB) -> RGB:
+    hue, saturation, value = colorsys.rgb_to_hsv(*(channel / 255 for channel in color))
+    return tuple(
+        round(channel * 255) for channel in colorsys.hsv_to_rgb((hue + 0.5) % 1, saturation, value)
+    )
+
+
+def _gradient(colors: Sequence[RGB]) -> Gradient:
+    """Gradient through the colors, a single color blends into its complement."""
+    stops = colors if len(colors) > 1 else (colors[0], _complement(colors[0]))
+    return Gradient(stops, speed=0.05)
+
+
+# effect factories get at least one color, the first one is the effect color
+EFFECTS: Dict[str, Callable[[Sequence[RGB]], Effect]] = {
+    EFFECT_RAINBOW: lambda colors: Rainbow(),
+    EFFECT_BREATHE: lambda colors: Breathe(colors[0]),
+    EFFECT_CHASE: lambda colors: Chase(colors[0]),
+    EFFECT_GRADIENT: _gradient,
+    EFFECT_CANDLE: lambda colors: Candle(),
+}
+
+
+class EffectRunner:
+    """Render an effect at a frame rate and stream it to Prismatik."""
+
+    def __init__(self, client: "PrismatikClient", effect: Effect, fps: float = DEFAULT_EFFECT_FPS) -> None:
+        """Intialize."""
+        self._client = client
+        self._effect = effect
+        self._interval = 1 / fps
+        self._stream = FrameStream(client, fps)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Effect task status"""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Frame stream stats"""
+        return self._stream.stats
+
+    def start(self) -> None:
+        """Start rendering."""
+        if not self.is_running:
+            self._stream.start()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop rendering and give the LEDs back to Prismatik."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._stream.stop()
+        await self._client.unlock()
+
+    async def _run(self) -> None:
+        """Render loop."""
+        loop = asyncio.get_running_loop()
+        leds = await self._client.leds()
+        start = loop.time()
+        while True:
+            if leds:
+                self._stream.push(self._effect.render(loop.time() - start, leds))
+            await asyncio.sleep(self._interval)
+            if not leds:
+                leds = await self._client.leds()
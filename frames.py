@@ -0,0 +1,379 @@
+"""Prismatik LED frames"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from .const import (
+    ATTR_FPS,
+    ATTR_FRAMES_DROPPED,
+    ATTR_FRAMES_SENT,
+    COMPOSER_FLUSH_DELAY,
+    DEFAULT_STREAM_FPS,
+    DELTA_MAX_RATIO,
+    STREAM_MAX_IN_FLIGHT,
+    STREAM_MAX_WRITE_BUFFER,
+)
+
+if TYPE_CHECKING:
+    from .prismatik import PrismatikClient
+
+_LOGGER = logging.getLogger(__name__)
+
+# packed (R,G,B) bytes, any buffer (bytes, bytearray, array('B'), numpy uint8...)
+# or a sequence of (R,G,B) triples
+Frame = Union[bytes, bytearray, memoryview, Sequence[Tuple[int, int, int]]]
+
+_CHANNELS = [str(value).encode() for value in range(256)]
+_BUCKETS = bytes(value >> 4 for value in range(256))
+# per bucket: 0xFF for channel values in it, 0 otherwise
+_BUCKET_MASKS = [
+    bytes(0xFF if value >> 4 == bucket else 0 for value in range(256)) for bucket in range(16)
+]
+_LOW_NIBBLES = bytes(value & 0x0F for value in range(256))
+
+
+def as_buffer(frame: Frame) -> memoryview:
+    """Packed (R,G,B) view of a frame, without copying buffers."""
+    try:
+        return memoryview(frame).cast("B")
+    except TypeError:
+        return memoryview(bytes(chain.from_iterable(frame)))
+
+
+class FrameEncoder:
+    """Encode frames into setcolor payloads, reusing the same buffers."""
+
+    def __init__(self) -> None:
+        """Intialize."""
+        self._prefixes: List[bytes] = []
+        self._buffer = bytearray()
+
+    def _led_prefixes(self, leds: int) -> List[bytes]:
+        """`N-` prefix for each LED (1-based)."""
+        for led in range(len(self._prefixes) + 1, leds + 1):
+            self._prefixes.append(f"{led}-".encode())
+        return self._prefixes
+
+    def encode(
+        self,
+        frame: Frame,
+        leds: int,
+        indexes: Optional[Iterable[int]] = None,
+    ) -> bytearray:
+        """setcolor payload for the first `leds` LEDs of the frame.
+
+        Only LEDs in `indexes` (0-based) are included when given.
+        The returned buffer is reused by the next call.
+        """
+        pixels = as_buffer(frame)
+        leds = min(leds, len(pixels) // 3)
+        prefixes = self._led_prefixes(leds)
+        buffer = self._buffer
+        del buffer[:]
+        buffer += b"setcolor:"
+        for led in range(leds) if indexes is None else indexes:
+            offset = led * 3
+            buffer += prefixes[led]
+            buffer += _CHANNELS[pixels[offset]]
+            buffer += b","
+            buffer += _CHANNELS[pixels[offset + 1]]
+            buffer += b","
+            buffer += _CHANNELS[pixels[offset + 2]]
+            buffer += b";"
+        buffer += b"\n"
+        return buffer
+
+
+def changed_leds(frame: memoryview, previous: Optional[bytes], leds: int) -> Optional[List[int]]:
+    """Indexes of LEDs that differ from the previous frame.
+
+    None when a full frame is worth sending instead: no previous frame,
+    different size, or too many LEDs changed for a delta to pay off.
+    """
+    if previous is None or len(previous) != leds * 3 or len(frame) < leds * 3:
+        return None
+    changed = []
+    limit = leds * DELTA_MAX_RATIO
+    for led in range(leds):
+        offset = led * 3
+        if (
+            frame[offset] != previous[offset]
+            or frame[offset + 1] != previous[offset + 1]
+            or frame[offset + 2] != previous[offset + 2]
+        ):
+            changed.append(led)
+            if len(changed) > limit:
+                return None
+    return changed
+
+
+def parse_led_ranges(ranges: str) -> List[int]:
+    """0-based LED indexes from 1-based ranges like `1-10,15,20-25`."""
+    indexes: List[int] = []
+    for part in filter(None, (part.strip() for part in ranges.split(","))):
+        first, _, last = part.partition("-")
+        start, end = int(first), int(last or first)
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid LED range: {part}")
+        indexes.extend(range(start - 1, end))
+    if not indexes:
+        raise ValueError("No LEDs")
+    return indexes
+
+
+def average_color(frame: Frame, indexes: Sequence[int]) -> Optional[Tuple[int, int, int]]:
+    """Average (R,G,B) of some LEDs of a frame, LEDs out of the frame are ignored."""
+    pixels = as_buffer(frame)
+    leds = len(pixels) // 3
+    red = green = blue = count = 0
+    for led in indexes:
+        if led >= leds:
+            continue
+        offset = led * 3
+        red += pixels[offset]
+        green += pixels[offset + 1]
+        blue += pixels[offset + 2]
+        count += 1
+    if count == 0:
+        return None
+    return (round(red / count), round(green / count), round(blue / count))
+
+
+def parse_segments(segments: str) -> List[Tuple[str, List[int]]]:
+    """Named LED ranges from `Left:1-20;Top:21-60`."""
+    parsed = []
+    for part in filter(None, (part.strip() for part in segments.split(";"))):
+        name, colon, ranges = part.partition(":")
+        if not colon or not name.strip():
+            raise ValueError(f"Invalid segment: {part}")
+        parsed.append((name.strip(), parse_led_ranges(ranges)))
+    return parsed
+
+
+class FrameComposer:
+    """Merge LED updates from several writers into one setcolor per tick.
+
+    The composed frame starts from the last known colors and every writer
+    only changes its own LEDs, so writers never overwrite each other.
+    """
+
+    def __init__(self, client: "PrismatikClient", profile: Optional[str] = None) -> None:
+        """Intialize."""
+        self._client = client
+        self._profile = profile
+        self._frame: Optional[bytearray] = None
+        self._pending: Optional[asyncio.Future] = None
+        # asyncio only keeps weak references to tasks
+        self._flushing: Set[asyncio.Task] = set()
+        self._turn_on = False
+
+    def sync(self, frame: Optional[Frame]) -> None:
+        """Adopt colors read from Prismatik, unless a write is pending."""
+        if frame is not None and self._pending is None:
+            self._frame = bytearray(as_buffer(frame))
+
+    async def async_set_leds(
+        self,
+        indexes: Iterable[int],
+        rgb: Tuple[int, int, int],
+        turn_on: bool = False,
+    ) -> bool:
+        """Set some LEDs to (R,G,B), sent with other updates of the same tick.
+
+        With turn_on, the light is turned on once for the whole tick.
+        """
+        self._turn_on = self._turn_on or turn_on
+        leds = await self._client.leds()
+        if leds == 0:
+            return False
+        frame = self._frame
+        if frame is None or len(frame) != leds * 3:
+            frame = self._frame = bytearray(leds * 3)
+        color = bytes(rgb)
+        for led in indexes:
+            if led < leds:
+                frame[led * 3:led * 3 + 3] = color
+        if self._pending is None:
+            loop = asyncio.get_running_loop()
+            self._pending = loop.create_future()
+            loop.call_later(COMPOSER_FLUSH_DELAY, self._start_flush)
+        return await asyncio.shield(self._pending)
+
+    def _start_flush(self) -> None:
+        """Flush in a task kept referenced until done."""
+        task = asyncio.get_running_loop().create_task(self._async_flush())
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _async_flush(self) -> None:
+        """Send the composed frame."""
+        pending, self._pending = self._pending, None
+        turn_on, self._turn_on = self._turn_on, False
+        try:
+            if turn_on:
+                await self._client.turn_on()
+            result = await self._client.set_frame(bytes(self._frame), self._profile)
+            await self._client.unlock()
+        except Exception as err:  # pylint: disable=broad-except
+            pending.set_exception(err)
+        else:
+            pending.set_result(result)
+
+
+class FrameStats(NamedTuple):
+    """Summary of a frame."""
+
+    average: Tuple[int, int, int]
+    dominant: Tuple[int, int, int]
+
+
+def frame_stats(frame: Frame) -> Optional[FrameStats]:
+    """Average and dominant (R,G,B) of a frame.
+
+    Channels are summed and colors counted with slicing and Counter, which
+    run in C, instead of walking the LEDs in Python. The dominant color is
+    the average of the most common bucket of colors (4 bits per channel):
+    LEDs of the bucket are selected with a byte mask, combined as big
+    integers, so only the low 4 bits of their channels remain to be summed.
+    """
+    pixels = as_buffer(frame)
+    leds = len(pixels) // 3
+    if leds == 0:
+        return None
+    pixels = bytes(pixels[:leds * 3])
+    reds, greens, blues = pixels[0::3], pixels[1::3], pixels[2::3]
+    average = (
+        round(sum(reds) / leds),
+        round(sum(greens) / leds),
+        round(sum(blues) / leds),
+    )
+    buckets = pixels.translate(_BUCKETS)
+    keys = list(zip(buckets[0::3], buckets[1::3], buckets[2::3]))
+    bucket, count = Counter(keys).most_common(1)[0]
+    channels = (reds, greens, blues)
+    mask = -1
+    for channel, level in zip(channels, bucket):
+        mask &= int.from_bytes(channel.translate(_BUCKET_MASKS[level]), "little")
+
+    def bucket_sum(channel: bytes) -> int:
+        """Sum of the low 4 bits of the channel over the LEDs of the bucket."""
+        low = int.from_bytes(channel.translate(_LOW_NIBBLES), "little") & mask
+        return sum(low.to_bytes(leds, "little"))
+
+    dominant = tuple(
+        round(level * 16 + bucket_sum(channel) / count)
+        for channel, level in zip(channels, bucket)
+    )
+    return FrameStats(average, dominant)
+
+
+class FrameStream:
+    """Push frames to Prismatik at a target rate, dropping frames when it lags."""
+
+    def __init__(self, client: "PrismatikClient", fps: float = DEFAULT_STREAM_FPS) -> None:
+        """Intialize."""
+        self._client = client
+        self.fps_limit = fps
+        self._interval = 1 / fps
+        self._frame: Optional[Frame] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+        self.fps = 0.0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    @property
+    def is_running(self) -> bool:
+        """Streaming task status"""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Achieved frame rate, sent and dropped frames"""
+        return {
+            ATTR_FPS: round(self.fps, 1),
+            ATTR_FRAMES_SENT: self.frames_sent,
+            ATTR_FRAMES_DROPPED: self.frames_dropped,
+        }
+
+    def start(self) -> None:
+        """Start streaming."""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop streaming, pending frame is discarded."""
+        task, self._task = self._task, None
+        self._frame = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def push(self, frame: Frame) -> None:
+        """Queue a frame, replacing the one not sent yet."""
+        if self._frame is not None:
+            self.frames_dropped += 1
+        self._frame = frame
+        self._wakeup.set()
+
+    def _backed_up(self) -> bool:
+        """Whether the connection is still busy with previous frames."""
+        return (
+            self._in_flight >= STREAM_MAX_IN_FLIGHT
+            or self._client.write_buffer_size > STREAM_MAX_WRITE_BUFFER
+        )
+
+    async def _send(self, frame: Frame) -> None:
+        """Send one frame and account for it."""
+        self._in_flight += 1
+        try:
+            if await self._client.set_frame(frame):
+                self.frames_sent += 1
+                self._window_frames += 1
+        finally:
+            self._in_flight -= 1
+
+    def _update_fps(self, now: float) -> None:
+        """Achieved frame rate over the last second."""
+        elapsed = now - self._window_start
+        if elapsed >= 1:
+            self.fps = self._window_frames / elapsed
+            self._window_start = now
+            self._window_frames = 0
+
+    async def _run(self) -> None:
+        """Streaming loop."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        sending = set()
+        try:
+            while True:
+                await self._wakeup.wait()
+                delay = next_tick - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_tick = max(next_tick + self._interval, loop.time())
+                self._update_fps(time.monotonic())
+                self._wakeup.clear()
+                frame, self._frame = self._frame, None
+                if frame is None:
+                    continue
+                if self._backed_up():
+                    self.frames_dropped += 1
+                    continue
+                task = asyncio.create_task(self._send(frame))
+                sending.add(task)
+                task.add_done_callback(sending.discard)
+        finally:
+            for task in sending:
+                task.cancel()
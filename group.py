@@ -0,0 +1,82 @@
+"""Synchronized writes to several Prismatik servers"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Sequence, Union
+
+from .const import GROUP_START_MARGIN
+from .snapshot import PrismatikSnapshot
+
+if TYPE_CHECKING:
+    from .prismatik import PrismatikClient
+
+
+class GroupWrite(NamedTuple):
+    """Prepared batch of one group member."""
+
+    name: str
+    client: "PrismatikClient"
+    snapshot: PrismatikSnapshot
+    requests: List[Union[str, bytes]]
+
+
+class GroupTiming(NamedTuple):
+    """When a member batch was sent and answered, in seconds after the group instant."""
+
+    name: str
+    ok: bool
+    sent: float
+    answered: float
+
+    @property
+    def applied(self) -> float:
+        """Estimated time Prismatik applied the batch, half way through the round trip"""
+        return (self.sent + self.answered) / 2
+
+
+async def _send_at(write: GroupWrite, when: float, instant: float) -> GroupTiming:
+    """Send a member batch at when (loop time)."""
+    loop = asyncio.get_running_loop()
+    delay = when - loop.time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    sent = loop.time()
+    ok = await write.client.restore_snapshot(write.snapshot, write.requests)
+    return GroupTiming(write.name, ok, sent - instant, loop.time() - instant)
+
+
+async def async_send_together(
+    writes: Sequence[GroupWrite],
+    margin: float = GROUP_START_MARGIN,
+) -> List[GroupTiming]:
+    """Send every prepared batch concurrently so they apply at the same instant.
+
+    Each member is sent half its smoothed round trip time early, so slower
+    servers do not lag behind the others.
+    """
+    loop = asyncio.get_running_loop()
+    leads = [(write.client.latency or 0) / 2 for write in writes]
+    instant = loop.time() + margin + max(leads, default=0)
+    return list(
+        await asyncio.gather(
+            *(_send_at(write, instant - lead, instant) for write, lead in zip(writes, leads))
+        )
+    )
+
+
+def group_report(timings: Sequence[GroupTiming]) -> Dict[str, Any]:
+    """Total latency and spread between members, in milliseconds."""
+    if not timings:
+        return {"latency_ms": None, "spread_ms": None, "members": {}}
+    applied = [timing.applied for timing in timings]
+    return {
+        "latency_ms": round(max(timing.answered for timing in timings) * 1000, 2),
+        "spread_ms": round((max(applied) - min(applied)) * 1000, 2),
+        "members": {
+            timing.name: {
+                "ok": timing.ok,
+                "sent_ms": round(timing.sent * 1000, 2),
+                "applied_ms": round(timing.applied * 1000, 2),
+            }
+            for timing in timings
+        },
+    }
@@ -0,0 +1,86 @@
+"""Prismatik connection health"""
+
+import random
+import time
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from .const import BACKOFF_BASE, BACKOFF_JITTER, BACKOFF_MAX
+
+
+class HealthState(Enum):
+    """Circuit breaker states."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __str__(self) -> str:
+        # pylint: disable=invalid-str-returned
+        return self.value
+
+
+class ConnectionHealth:
+    """Circuit breaker with exponential backoff for a connection.
+
+    While open, attempts are refused until the backoff delay expires,
+    then a single attempt is let through (half open) to probe the server.
+    """
+
+    def __init__(self) -> None:
+        """Intialize."""
+        self.state = HealthState.CLOSED
+        self.failures = 0
+        self.total_failures = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self._next_attempt = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the next attempt is allowed"""
+        if self.state is not HealthState.OPEN:
+            return 0.0
+        return max(self._next_attempt - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Whether a connection attempt may go through now."""
+        if self.state is HealthState.CLOSED:
+            return True
+        if self.state is HealthState.OPEN and time.monotonic() >= self._next_attempt:
+            self.state = HealthState.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Connection established."""
+        if self.connects:
+            self.reconnects += 1
+        self.connects += 1
+        self.state = HealthState.CLOSED
+        self.failures = 0
+        self.last_error = None
+
+    def record_failure(self, error: str) -> float:
+        """Connection failed or timed out, returns backoff delay."""
+        self.failures += 1
+        self.total_failures += 1
+        self.last_error = error
+        delay = min(BACKOFF_BASE * 2 ** (self.failures - 1), BACKOFF_MAX)
+        delay *= 1 + random.uniform(-BACKOFF_JITTER, BACKOFF_JITTER)
+        self._next_attempt = time.monotonic() + delay
+        self.state = HealthState.OPEN
+        return delay
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Metrics."""
+        return {
+            "state": str(self.state),
+            "failures": self.failures,
+            "total_failures": self.total_failures,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "retry_in": round(self.retry_in, 1),
+            "last_error": self.last_error,
+        }
@@ -1,15 +1,19 @@
 """Prismatik light."""
-from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import homeassistant.helpers.config_validation as cv
-import homeassistant.util.color as color_util
 import voluptuous as vol
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_EFFECT,
     ATTR_EFFECT_LIST,
     ATTR_HS_COLOR,
+    ATTR_TRANSITION,
     COLOR_MODE_HS,
+    DOMAIN as LIGHT_DOMAIN,
+    VALID_BRIGHTNESS,
     ColorMode,
     LightEntity,
     LightEntityFeature,
@@ -17,25 +21,86 @@ from homeassistant.components.light import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    ATTR_NAME,
     ATTR_STATE,
     CONF_API_KEY,
     CONF_HOST,
     CONF_NAME,
     CONF_PORT,
     CONF_PROFILE_NAME,
+    STATE_ON,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    State,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_platform, service
+from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import (
+    ATTR_COLORS,
+    ATTR_FPS,
+    ATTR_FRAME,
+    ATTR_INTERVAL,
+    ATTR_LEDS,
+    ATTR_MIN_DELTA,
+    ATTR_TARGETS,
+    ATTR_ZONES,
+    CONF_COMMAND_INTERVAL,
+    CONF_GAMMA,
+    CONF_SEGMENTS,
+    CONF_WHITE_BALANCE,
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_GAMMA,
     DEFAULT_ICON_OFF,
     DEFAULT_ICON_ON,
+    DEFAULT_MIRROR_INTERVAL,
+    DEFAULT_MIRROR_MIN_DELTA,
     DEFAULT_NAME,
     DEFAULT_PORT,
     DEFAULT_PROFILE_NAME,
-    DOMAIN
+    DEFAULT_SNAPSHOT,
+    DEFAULT_STREAM_FPS,
+    DEFAULT_WHITE_BALANCE,
+    DOMAIN,
+    SERVICE_EFFECT_START,
+    SERVICE_GROUP_SET,
+    SERVICE_MIRROR_START,
+    SERVICE_MIRROR_STOP,
+    SERVICE_SNAPSHOT_RESTORE,
+    SERVICE_SNAPSHOT_SAVE,
+    SERVICE_STREAM_FRAME,
+    SERVICE_STREAM_STOP,
 )
 
-from .prismatik import PrismatikClient
+from .coalescer import CommandCoalescer, Target
+from .effects import EFFECTS, EffectRunner
+from .frames import FrameComposer, FrameStream, average_color, parse_led_ranges, parse_segments
+from .group import GroupWrite, async_send_together, group_report
+from .mirror import MirrorZone, PrismatikMirror
+from .pipeline import ColorPipeline, hs_to_rgb, parse_balance, rgb_to_hsv, scale_table
+from .prismatik import PrismatikClient, PrismatikState
+from .protocol import PrismatikAPI
+from .registry import get_registry
+from .snapshot import PrismatikSnapshot
+from .transition import interpolate, interpolate_hs, run_transition
+
+_LOGGER = logging.getLogger(__name__)
+
+def white_balance(value: Any) -> str:
+    """Validate per-channel gains like `1,0.9,0.8`."""
+    value = cv.string(value)
+    try:
+        parse_balance(value)
+    except ValueError as err:
+        raise vol.Invalid(str(err)) from err
+    return value
+
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
@@ -44,9 +109,193 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_API_KEY): cv.string,
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
         vol.Optional(CONF_PROFILE_NAME, default=DEFAULT_PROFILE_NAME): cv.string,
+        vol.Optional(CONF_SEGMENTS): cv.string,
+        vol.Optional(CONF_COMMAND_INTERVAL, default=DEFAULT_COMMAND_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=5)
+        ),
+        vol.Optional(CONF_WHITE_BALANCE, default=DEFAULT_WHITE_BALANCE): white_balance,
+    }
+)
+
+def led_ranges(value: Any) -> List[int]:
+    """Validate 1-based LED ranges like `1-10,15`."""
+    try:
+        return parse_led_ranges(cv.string(value))
+    except ValueError as err:
+        raise vol.Invalid(str(err)) from err
+
+
+MIRROR_SCHEMA = {
+    vol.Required(ATTR_ZONES): vol.All(
+        cv.ensure_list,
+        [
+            vol.Schema(
+                {
+                    vol.Required(ATTR_LEDS): led_ranges,
+                    vol.Required(ATTR_TARGETS): cv.entity_ids,
+                }
+            )
+        ],
+    ),
+    vol.Optional(ATTR_INTERVAL, default=DEFAULT_MIRROR_INTERVAL): vol.All(
+        vol.Coerce(float), vol.Range(min=0.05)
+    ),
+    vol.Optional(ATTR_MIN_DELTA, default=DEFAULT_MIRROR_MIN_DELTA): vol.All(
+        vol.Coerce(int), vol.Range(min=0, max=255)
+    ),
+}
+
+EFFECT_SCHEMA = {
+    vol.Required(ATTR_EFFECT): vol.In(list(EFFECTS)),
+    vol.Optional(ATTR_COLORS): vol.All(
+        cv.ensure_list,
+        [vol.ExactSequence((cv.byte, cv.byte, cv.byte))],
+        vol.Length(min=1),
+    ),
+}
+
+SNAPSHOT_SCHEMA = {
+    vol.Optional(ATTR_NAME, default=DEFAULT_SNAPSHOT): cv.string,
+}
+
+STREAM_SCHEMA = {
+    vol.Required(ATTR_FRAME): vol.All(
+        cv.ensure_list,
+        [vol.ExactSequence((cv.byte, cv.byte, cv.byte))],
+    ),
+    vol.Optional(ATTR_FPS, default=DEFAULT_STREAM_FPS): vol.All(
+        vol.Coerce(float), vol.Range(min=1, max=120)
+    ),
+}
+
+GROUP_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_STATE, default=True): cv.boolean,
+        vol.Optional(ATTR_HS_COLOR): vol.All(
+            vol.Coerce(tuple),
+            vol.ExactSequence(
+                (
+                    vol.All(vol.Coerce(float), vol.Range(min=0, max=360)),
+                    vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                )
+            ),
+        ),
+        vol.Optional(ATTR_BRIGHTNESS): VALID_BRIGHTNESS,
     }
 )
 
+
+async def _async_group_lights(hass: HomeAssistant, call: ServiceCall) -> List["PrismatikLight"]:
+    """Prismatik lights targeted by a group call, by entity, device or area."""
+    entities = {}
+    for platform in entity_platform.async_get_platforms(hass, DOMAIN):
+        if platform.domain == LIGHT_DOMAIN:
+            entities.update(platform.entities)
+    # areas and devices may hold other lights, only Prismatik ones are set
+    lights = [
+        entities[entity_id]
+        for entity_id in sorted(await service.async_extract_entity_ids(hass, call))
+        if isinstance(entities.get(entity_id), PrismatikLight)
+    ]
+    if not lights:
+        raise HomeAssistantError("No Prismatik light targeted")
+    return lights
+
+
+async def _async_group_set(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Set every light of the group at the same instant, report how far apart they changed."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    lights = await _async_group_lights(hass, call)
+    # every round trip before the instant happens now, concurrently
+    results = await asyncio.gather(
+        *(light.async_group_prepare(call.data) for light in lights), return_exceptions=True
+    )
+    prepared = []
+    errors: Dict[str, str] = {}
+    for light, result in zip(lights, results):
+        if isinstance(result, BaseException):
+            _LOGGER.warning("Could not prepare %s for the group: %s", light.entity_id, result)
+            errors[light.entity_id] = str(result) or type(result).__name__
+            # the lock may have been taken before the failure
+            await light.async_group_written({}, False)
+        else:
+            prepared.append((light, result))
+    timings = await async_send_together([write for _, (write, _) in prepared])
+    for (light, (_, written)), timing in zip(prepared, timings):
+        await light.async_group_written(written, timing.ok)
+    report = group_report(timings)
+    report["total_ms"] = round((loop.time() - start) * 1000, 2)
+    for name, error in errors.items():
+        report["members"][name] = {"ok": False, "error": error}
+    _LOGGER.debug("Group of %d set, spread %s ms", len(lights), report["spread_ms"])
+    failed = list(errors) + [timing.name for timing in timings if not timing.ok]
+    if failed:
+        raise HomeAssistantError(f"Could not set {', '.join(failed)}")
+    return report
+
+
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register Prismatik light services."""
+    if not hass.services.has_service(DOMAIN, SERVICE_GROUP_SET):
+
+        async def async_group_set(call: ServiceCall) -> ServiceResponse:
+            return await _async_group_set(hass, call)
+
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_GROUP_SET,
+            async_group_set,
+            schema=GROUP_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_MIRROR_START, MIRROR_SCHEMA, "async_mirror_start"
+    )
+    platform.async_register_entity_service(SERVICE_MIRROR_STOP, {}, "async_mirror_stop")
+    platform.async_register_entity_service(
+        SERVICE_SNAPSHOT_SAVE, SNAPSHOT_SCHEMA, "async_snapshot_save"
+    )
+    platform.async_register_entity_service(
+        SERVICE_SNAPSHOT_RESTORE, SNAPSHOT_SCHEMA, "async_snapshot_restore"
+    )
+    platform.async_register_entity_service(
+        SERVICE_STREAM_FRAME, STREAM_SCHEMA, "async_stream_frame"
+    )
+    platform.async_register_entity_service(SERVICE_STREAM_STOP, {}, "async_stream_stop")
+    platform.async_register_entity_service(
+        SERVICE_EFFECT_START, EFFECT_SCHEMA, "async_effect_start"
+    )
+
+
+def _color_pipeline(config: Dict) -> ColorPipeline:
+    """Gamma and white balance correction of the entry."""
+    return ColorPipeline(
+        float(config.get(CONF_GAMMA, DEFAULT_GAMMA)),
+        parse_balance(config.get(CONF_WHITE_BALANCE) or DEFAULT_WHITE_BALANCE),
+    )
+
+
+def _segment_lights(
+    hass: HomeAssistant,
+    config: Dict,
+    client: PrismatikClient,
+) -> List[LightEntity]:
+    """One light per configured LED segment, all sharing client."""
+    segments = config.get(CONF_SEGMENTS)
+    if not segments:
+        return []
+    composer = get_registry(hass).composer(client, config.get(CONF_PROFILE_NAME))
+    return [
+        PrismatikSegmentLight(hass, f"{config[CONF_NAME]} {segment}", client, composer, segment, leds)
+        for segment, leds in parse_segments(segments)
+    ]
+
+
 async def async_setup_platform(
     hass: HomeAssistant,
     config: Dict,
@@ -56,15 +305,22 @@ async def async_setup_platform(
     """Set up the Prismatik Light platform."""
     # pylint: disable=unused-argument
 
-    client = PrismatikClient(
-            config[CONF_HOST],
-            config[CONF_PORT],
-            config.get(CONF_API_KEY)
-        )
-    light = PrismatikLight(hass, config[CONF_NAME], client, config.get(CONF_PROFILE_NAME))
-    await light.async_update()
-
-    async_add_entities([light])
+    client = await get_registry(hass).async_acquire(
+        config[CONF_HOST],
+        config[CONF_PORT],
+        config.get(CONF_API_KEY)
+    )
+    get_registry(hass).use_color_pipeline(client, _color_pipeline(config))
+    light = PrismatikLight(
+        hass,
+        config[CONF_NAME],
+        client,
+        config.get(CONF_PROFILE_NAME),
+        config.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL),
+    )
+    # state is fetched in the background, setup does not wait for Prismatik
+    async_add_entities([light, *_segment_lights(hass, config, client)])
+    _async_register_services(hass)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -75,18 +331,25 @@ async def async_setup_entry(
     config = hass.data[DOMAIN][config_entry.entry_id]
     if config_entry.options:
         config.update(config_entry.options)
-    client = PrismatikClient(
+    client = await get_registry(hass).async_acquire(
         config[CONF_HOST],
         config[CONF_PORT],
         config.get(CONF_API_KEY)
     )
-    light = PrismatikLight(hass, config[CONF_NAME], client, config.get(CONF_PROFILE_NAME))
-    await light.async_update()
-
-    async_add_entities([light])
+    get_registry(hass).use_color_pipeline(client, _color_pipeline(config))
+    light = PrismatikLight(
+        hass,
+        config[CONF_NAME],
+        client,
+        config.get(CONF_PROFILE_NAME),
+        config.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL),
+    )
+    # state is fetched in the background, setup does not wait for Prismatik
+    async_add_entities([light, *_segment_lights(hass, config, client)])
+    _async_register_services(hass)
 
 
-class PrismatikLight(LightEntity):
+class PrismatikLight(LightEntity, RestoreEntity):
     """Representation of Prismatik."""
 
     def __init__(
@@ -94,20 +357,30 @@ class PrismatikLight(LightEntity):
         hass: HomeAssistant,
         name: str,
         client: PrismatikClient,
-        profile: Optional[str]
+        profile: Optional[str],
+        command_interval: float = DEFAULT_COMMAND_INTERVAL,
     ) -> None:
         """Intialize."""
         self._hass = hass
         self._name = name
         self._client = client
         self._profile = profile
+        self._commands = CommandCoalescer(self._async_write, command_interval, self._merge_targets)
 
         host = self._client.host.replace(".", "_")
         self._unique_id = f"{host}_{self._client.port}"
 
         self._attr_color_mode = ColorMode.HS
         self._attr_supported_color_modes = set({ColorMode.HS})
-        self._attr_supported_features = LightEntityFeature.EFFECT
+        self._attr_supported_features = LightEntityFeature.EFFECT | LightEntityFeature.TRANSITION
+        self._transition: Optional[asyncio.Task] = None
+        self._watcher = get_registry(hass).watcher(client)
+        self._remove_listener: Optional[Callable[[], None]] = None
+        self._mirror: Optional[PrismatikMirror] = None
+        self._effect: Optional[EffectRunner] = None
+        self._effect_name: Optional[str] = None
+        self._stream: Optional[FrameStream] = None
+        self._attr_should_poll = False
 
         self._state = {
             ATTR_STATE : False,
@@ -117,9 +390,179 @@ class PrismatikLight(LightEntity):
             ATTR_HS_COLOR : None,
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Restore last state and watch Prismatik for changes."""
+        if self._client.is_connected and self._watcher.state is not None:
+            self._apply_state(self._watcher.state)
+        else:
+            self._restore_state(await self.async_get_last_state())
+        self._remove_listener = self._watcher.add_listener(self._handle_state)
+
+    def _restore_state(self, last_state: Optional[State]) -> None:
+        """Last known state until Prismatik answers."""
+        if last_state is None:
+            return
+        self._state[ATTR_STATE] = last_state.state == STATE_ON
+        for attr in (ATTR_BRIGHTNESS, ATTR_HS_COLOR):
+            self._state[attr] = last_state.attributes.get(attr)
+        # built-in effects are not running anymore, only profiles are restored
+        effect = last_state.attributes.get(ATTR_EFFECT)
+        self._state[ATTR_EFFECT] = effect if effect not in EFFECTS else None
+        effect_list = last_state.attributes.get(ATTR_EFFECT_LIST)
+        self._state[ATTR_EFFECT_LIST] = (
+            [name for name in effect_list if name not in EFFECTS] if effect_list else None
+        )
+
     async def async_will_remove_from_hass(self) -> None:
         """Disconnect from update signal."""
-        await self._client.disconnect()
+        self._cancel_transition()
+        await self._commands.async_cancel()
+        await self._async_stop_effect()
+        await self.async_mirror_stop()
+        if self._remove_listener is not None:
+            self._remove_listener()
+            self._remove_listener = None
+        registry = get_registry(self._hass)
+        registry.release_color_pipeline(self._client)
+        registry.release(self._client)
+
+    async def async_mirror_start(
+        self,
+        zones: List[Dict[str, Any]],
+        interval: float,
+        min_delta: int,
+    ) -> None:
+        """Mirror LED zone colors to other lights."""
+        await self.async_mirror_stop()
+        self._mirror = PrismatikMirror(
+            self._hass,
+            self._client,
+            [MirrorZone(zone[ATTR_LEDS], zone[ATTR_TARGETS]) for zone in zones],
+            interval,
+            min_delta,
+        )
+        self._mirror.start()
+
+    async def async_mirror_stop(self) -> None:
+        """Stop mirroring."""
+        if self._mirror is not None:
+            await self._mirror.stop()
+            self._mirror = None
+
+    async def async_group_prepare(self, data: Dict[str, Any]) -> Tuple[GroupWrite, Target]:
+        """Stop local writes and prepare the batch applying a group target."""
+        await self._commands.async_cancel()
+        self._cancel_transition()
+        await self._async_stop_effect()
+        hs_color = data.get(ATTR_HS_COLOR) or self._state[ATTR_HS_COLOR] or (0, 0)
+        brightness = data.get(ATTR_BRIGHTNESS, self._state[ATTR_BRIGHTNESS] or 255)
+        # the profile is set up now, so the batch itself is a single round trip
+        if self._profile and not await self._client.use_profile(self._profile):
+            raise HomeAssistantError(f"Could not use profile {self._profile} on {self._name}")
+        leds = await self._client.leds()
+        rgb = self._client.color_pipeline.correct(hs_to_rgb(*hs_color))
+        snapshot = PrismatikSnapshot(
+            is_on=data[ATTR_STATE],
+            profile=self._profile,
+            mode=PrismatikAPI.MOD_MOODLIGHT.value if self._profile else None,
+            brightness=round(brightness / 2.55),
+            colors=bytes(rgb) * leds if leds else None,
+        )
+        written = {
+            ATTR_STATE: data[ATTR_STATE],
+            ATTR_BRIGHTNESS: brightness,
+            ATTR_HS_COLOR: tuple(hs_color),
+        }
+        requests = self._client.snapshot_requests(snapshot)
+        return GroupWrite(self.entity_id, self._client, snapshot, requests), written
+
+    async def async_group_written(self, written: Target, success: bool) -> None:
+        """Group batch was sent."""
+        await self._client.unlock()
+        if success:
+            self._state.update(written)
+            self.async_write_ha_state()
+        self._watcher.refresh()
+
+    async def async_snapshot_save(self, name: str) -> None:
+        """Capture status, profile, mode, brightness and LED colors."""
+        snapshot = await self._client.get_snapshot()
+        if snapshot is None:
+            raise HomeAssistantError(f"Could not read {self._name} state")
+        get_registry(self._hass).snapshots(self._client)[name] = snapshot
+
+    async def async_snapshot_restore(self, name: str) -> None:
+        """Apply a saved snapshot in one batch of commands."""
+        snapshot = get_registry(self._hass).snapshots(self._client).get(name)
+        if snapshot is None:
+            raise HomeAssistantError(f"No snapshot {name} for {self._name}")
+        await self._commands.async_cancel()
+        self._cancel_transition()
+        await self._async_stop_effect()
+        try:
+            if not await self._client.restore_snapshot(snapshot):
+                raise HomeAssistantError(f"Could not restore {self._name}")
+        finally:
+            await self._client.unlock()
+            self._watcher.refresh()
+
+    @callback
+    def _handle_state(self, state: PrismatikState) -> None:
+        """Prismatik state changed."""
+        # keep the restored state while Prismatik can not be reached
+        if self._client.is_connected:
+            self._apply_state(state)
+        self.async_write_ha_state()
+
+    def _cancel_transition(self) -> None:
+        """Abort transition in progress, newer commands win."""
+        if self._transition is not None:
+            self._transition.cancel()
+            self._transition = None
+
+    def _start_transition(
+        self,
+        duration: float,
+        brightness: Optional[int] = None,
+        hs_color: Optional[List] = None,
+        turn_off: bool = False,
+    ) -> None:
+        """Fade brightness and/or color in the background."""
+        self._cancel_transition()
+        self._transition = self._hass.async_create_task(
+            self._async_transition(duration, brightness, hs_color, turn_off)
+        )
+
+    async def _async_transition(
+        self,
+        duration: float,
+        brightness: Optional[int],
+        hs_color: Optional[List],
+        turn_off: bool,
+    ) -> None:
+        """Push intermediate brightness/color until the target is reached."""
+        start_brightness = self._state[ATTR_BRIGHTNESS] or 0
+        start_hs = self._state[ATTR_HS_COLOR] or hs_color
+        profile = self._profile
+
+        async def step(progress: float) -> None:
+            # profile only needs to be set up once, on the first step
+            nonlocal profile
+            if brightness is not None:
+                value = interpolate(start_brightness, brightness, progress)
+                await self._client.set_brightness(round(value / 2.55), profile)
+            if hs_color is not None:
+                rgb = hs_to_rgb(*interpolate_hs(start_hs, hs_color, progress))
+                await self._client.set_color(rgb, profile)
+            profile = None
+
+        await run_transition(duration, step, lambda: self._client.latency)
+        if turn_off:
+            await self._client.turn_off()
+            # leave brightness as it was for the next turn on
+            await self._client.set_brightness(round(start_brightness / 2.55))
+        await self._client.unlock()
+        self._watcher.refresh()
 
     @property
     def hs_color(self) -> Optional[List]:
@@ -158,40 +601,273 @@ class PrismatikLight(LightEntity):
 
     @property
     def effect_list(self) -> Optional[List]:
-        """Return profile list."""
-        return self._state[ATTR_EFFECT_LIST]
+        """Return built-in effects and profile list."""
+        return [*EFFECTS, *(self._state[ATTR_EFFECT_LIST] or [])]
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Frame rate, sent and dropped frames while streaming or rendering an effect."""
+        if self._effect is not None:
+            return self._effect.stats
+        if self._stream is not None:
+            return self._stream.stats
+        return None
 
     @property
     def effect(self) -> Optional[str]:
-        """Return current profile."""
-        return self._state[ATTR_EFFECT]
+        """Return running effect or current profile."""
+        return self._effect_name or self._state[ATTR_EFFECT]
+
+    async def _async_start_effect(
+        self, name: str, hs_color: Optional[List], colors: Optional[List] = None
+    ) -> None:
+        """Render a built-in effect, in the current color unless colors are given."""
+        await self._async_stop_effect()
+        if not colors:
+            hs_color = hs_color or self._state[ATTR_HS_COLOR]
+            colors = [hs_to_rgb(*hs_color) if hs_color else (255, 255, 255)]
+        self._effect = EffectRunner(self._client, EFFECTS[name]([tuple(rgb) for rgb in colors]))
+        self._effect_name = name
+        self._effect.start()
+
+    async def _async_stop_effect(self) -> None:
+        """Stop the running built-in effect or frame stream."""
+        effect, self._effect = self._effect, None
+        self._effect_name = None
+        if effect is not None:
+            await effect.stop()
+        await self.async_stream_stop()
+
+    async def async_stream_frame(self, frame: List[Tuple[int, int, int]], fps: float) -> None:
+        """Queue a frame, sent at up to fps frames per second."""
+        if self._stream is None or self._stream.fps_limit != fps:
+            await self._async_stop_effect()
+            await self._commands.async_cancel()
+            self._cancel_transition()
+            self._stream = FrameStream(self._client, fps)
+            self._stream.start()
+        self._stream.push(frame)
+
+    async def async_stream_stop(self) -> None:
+        """Stop streaming and give the LEDs back to Prismatik."""
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            await stream.stop()
+            await self._client.unlock()
+            self.async_write_ha_state()
+
+    async def async_effect_start(self, effect: str, colors: Optional[List] = None) -> None:
+        """Start a built-in effect, gradient colors are its stops."""
+        await self._commands.async_cancel()
+        self._cancel_transition()
+        await self._client.turn_on()
+        await self._async_start_effect(effect, None, colors)
+        await self._client.unlock()
+        self._state[ATTR_EFFECT] = effect
+        self.async_write_ha_state()
+        self._watcher.refresh()
 
     async def async_update(self) -> None:
         """Update light state."""
-        self._state[ATTR_STATE] = await self._client.is_on()
+        self._apply_state(await self._watcher.async_refresh())
+
+    def _apply_state(self, state: PrismatikState) -> None:
+        """Update light state from Prismatik snapshot."""
+        self._state[ATTR_STATE] = state.is_on
 
-        self._state[ATTR_EFFECT] = await self._client.get_profile()
-        self._state[ATTR_EFFECT_LIST] = await self._client.get_profiles()
+        self._state[ATTR_EFFECT] = state.profile
+        self._state[ATTR_EFFECT_LIST] = state.profiles
 
-        brightness = await self._client.get_brightness()
+        brightness = state.brightness
         self._state[ATTR_BRIGHTNESS] = round(brightness * 2.55) if brightness else None
 
-        rgb = await self._client.get_color()
-        self._state[ATTR_HS_COLOR] = color_util.color_RGB_to_hs(*rgb) if rgb else None
+        rgb = state.color
+        self._state[ATTR_HS_COLOR] = rgb_to_hsv(*rgb)[:2] if rgb else None
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on."""
+        await self._commands.submit(kwargs)
+
+    @staticmethod
+    def _merge_targets(pending: Target, target: Target) -> Target:
+        """Merge turn on calls, a profile and a color exclude each other."""
+        if ATTR_EFFECT in target:
+            pending = {key: value for key, value in pending.items() if key != ATTR_HS_COLOR}
+        elif ATTR_HS_COLOR in target:
+            pending = {key: value for key, value in pending.items() if key != ATTR_EFFECT}
+        return {**pending, **target}
+
+    def _is_current(self, target: Target) -> bool:
+        """Target matches the known state, nothing to write."""
+        if not self.is_on or ATTR_TRANSITION in target:
+            return False
+        if ATTR_EFFECT in target and target[ATTR_EFFECT] != self.effect:
+            return False
+        if ATTR_BRIGHTNESS in target and target[ATTR_BRIGHTNESS] != self.brightness:
+            return False
+        if ATTR_HS_COLOR in target and (
+            self.hs_color is None
+            or hs_to_rgb(*target[ATTR_HS_COLOR])
+            != hs_to_rgb(*self.hs_color)
+        ):
+            return False
+        return True
+
+    async def _async_write(self, target: Target) -> None:
+        """Write merged turn on calls."""
+        if self._is_current(target):
+            return
+        self._cancel_transition()
+        if ATTR_EFFECT in target or ATTR_HS_COLOR in target:
+            # brightness alone keeps the effect running
+            await self._async_stop_effect()
         await self._client.turn_on()
-        if ATTR_EFFECT in kwargs:
-            await self._client.set_profile(kwargs[ATTR_EFFECT])
-        elif ATTR_BRIGHTNESS in kwargs:
-            await self._client.set_brightness(round(kwargs[ATTR_BRIGHTNESS] / 2.55), self._profile)
-        elif ATTR_HS_COLOR in kwargs:
-            rgb = color_util.color_hs_to_RGB(*kwargs[ATTR_HS_COLOR])
-            await self._client.set_color(rgb, self._profile)
+        if ATTR_TRANSITION in target and ATTR_EFFECT not in target and (
+            ATTR_BRIGHTNESS in target or ATTR_HS_COLOR in target
+        ):
+            self._start_transition(
+                target[ATTR_TRANSITION],
+                brightness=target.get(ATTR_BRIGHTNESS),
+                hs_color=target.get(ATTR_HS_COLOR),
+            )
+            self._watcher.refresh()
+            return
+        written = {}
+        if ATTR_EFFECT in target:
+            if target[ATTR_EFFECT] in EFFECTS:
+                await self._async_start_effect(target[ATTR_EFFECT], target.get(ATTR_HS_COLOR))
+                written[ATTR_EFFECT] = target[ATTR_EFFECT]
+            elif await self._client.set_profile(target[ATTR_EFFECT]):
+                written[ATTR_EFFECT] = target[ATTR_EFFECT]
+        if ATTR_BRIGHTNESS in target:
+            brightness = round(target[ATTR_BRIGHTNESS] / 2.55)
+            if await self._client.set_brightness(brightness, self._profile):
+                written[ATTR_BRIGHTNESS] = target[ATTR_BRIGHTNESS]
+        if ATTR_HS_COLOR in target and ATTR_EFFECT not in target:
+            rgb = hs_to_rgb(*target[ATTR_HS_COLOR])
+            if await self._client.set_color(rgb, self._profile):
+                written[ATTR_HS_COLOR] = target[ATTR_HS_COLOR]
         await self._client.unlock()
+        if written:
+            # next duplicate calls are skipped before the watcher catches up
+            self._state.update(written)
+            self.async_write_ha_state()
+        self._watcher.refresh()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
-        # pylint: disable=unused-argument
+        await self._commands.async_cancel()
+        self._cancel_transition()
+        await self._async_stop_effect()
+        if kwargs.get(ATTR_TRANSITION) and self.is_on and self._state[ATTR_BRIGHTNESS]:
+            self._start_transition(kwargs[ATTR_TRANSITION], brightness=0, turn_off=True)
+            return
         await self._client.turn_off()
+        self._watcher.refresh()
+
+
+class PrismatikSegmentLight(LightEntity, RestoreEntity):
+    """Named LED range of Prismatik, written through the shared frame composer."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        client: PrismatikClient,
+        composer: FrameComposer,
+        segment: str,
+        leds: List[int],
+    ) -> None:
+        """Intialize."""
+        self._hass = hass
+        self._client = client
+        self._composer = composer
+        self._leds = leds
+
+        host = self._client.host.replace(".", "_")
+        self._attr_unique_id = f"{host}_{self._client.port}_{segment}"
+        self._attr_name = name
+        self._attr_icon = DEFAULT_ICON_ON
+        self._attr_color_mode = ColorMode.HS
+        self._attr_supported_color_modes = set({ColorMode.HS})
+        self._attr_should_poll = False
+        self._attr_is_on = False
+        self._attr_brightness = None
+        self._attr_hs_color = None
+        self._watcher = get_registry(hass).watcher(client)
+        self._remove_listener: Optional[Callable[[], None]] = None
+        # last (H,S,V) while on, used when turned on without a color
+        self._on_color = (0.0, 0.0, 100.0)
+
+    async def async_added_to_hass(self) -> None:
+        """Restore last state and watch Prismatik for changes."""
+        if self._client.is_connected and self._watcher.state is not None:
+            self._apply_state(self._watcher.state)
+        else:
+            last_state = await self.async_get_last_state()
+            if last_state is not None:
+                self._attr_is_on = last_state.state == STATE_ON
+                self._attr_brightness = last_state.attributes.get(ATTR_BRIGHTNESS)
+                self._attr_hs_color = last_state.attributes.get(ATTR_HS_COLOR)
+        self._remove_listener = self._watcher.add_listener(self._handle_state)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Disconnect from update signal."""
+        if self._remove_listener is not None:
+            self._remove_listener()
+            self._remove_listener = None
+
+    @property
+    def available(self) -> bool:
+        """Return availability of the light."""
+        return self._client.is_connected
+
+    @callback
+    def _handle_state(self, state: PrismatikState) -> None:
+        """Prismatik state changed."""
+        # keep the restored state while Prismatik can not be reached
+        if self._client.is_connected:
+            self._apply_state(state)
+        self.async_write_ha_state()
+
+    def _apply_state(self, state: PrismatikState) -> None:
+        """Update segment state from Prismatik snapshot."""
+        self._composer.sync(state.colors)
+        rgb = average_color(state.colors, self._leds) if state.colors else None
+        if rgb is None:
+            self._attr_is_on = False
+            return
+        hue, saturation, value = rgb_to_hsv(*rgb)
+        self._attr_is_on = state.is_on and value > 0
+        if value > 0:
+            self._on_color = (hue, saturation, value)
+            self._attr_hs_color = (hue, saturation)
+            self._attr_brightness = round(value * 2.55)
+
+    async def async_update(self) -> None:
+        """Update segment state."""
+        self._apply_state(await self._watcher.async_refresh())
+
+    async def _async_set(self, hsv: Tuple[float, float, float]) -> None:
+        """Write segment color, merged with the other segments."""
+        # known status from the shared watcher, no round trip per segment
+        state = self._watcher.state
+        turn_on = state is None or not state.is_on
+        hue, saturation, value = hsv
+        rgb = bytes(hs_to_rgb(hue, saturation)).translate(scale_table(round(value * 2.55)))
+        await self._composer.async_set_leds(self._leds, tuple(rgb), turn_on)
+        self._watcher.refresh()
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Turn the segment on."""
+        hue, saturation, value = self._on_color
+        if ATTR_HS_COLOR in kwargs:
+            hue, saturation = kwargs[ATTR_HS_COLOR]
+        if ATTR_BRIGHTNESS in kwargs:
+            value = kwargs[ATTR_BRIGHTNESS] / 2.55
+        self._on_color = (hue, saturation, value)
+        await self._async_set(self._on_color)
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Turn the segment off."""
+        await self._async_set((0, 0, 0))
@@ -0,0 +1,155 @@
+"""Prismatik client metrics"""
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Union
+
+from .const import METRICS_LATENCY_BUCKETS
+
+RETRY_AUTH = "auth"
+RETRY_LOCK = "lock"
+
+
+def command_name(buffer: Union[str, bytes]) -> str:
+    """Command of a request line (`setcolor:...` is setcolor)."""
+    head = buffer[:32]
+    if isinstance(head, bytes):
+        head = head.decode(errors="replace")
+    return head.partition(":")[0].strip()
+
+
+class LatencyHistogram:
+    """Round trip times in milliseconds, counted in fixed buckets."""
+
+    def __init__(self, bounds: Sequence[float] = METRICS_LATENCY_BUCKETS) -> None:
+        """Intialize."""
+        self._bounds = bounds
+        self.buckets: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        """Count one sample."""
+        self.buckets[bisect_left(self._bounds, elapsed_ms)] += 1
+        self.count += 1
+        self.total += elapsed_ms
+        if elapsed_ms > self.max:
+            self.max = elapsed_ms
+
+    def percentile(self, ratio: float) -> float:
+        """Upper bound of the bucket holding the ratio-th sample."""
+        if self.count == 0:
+            return 0.0
+        rank = ratio * self.count
+        seen = 0
+        for bound, count in zip(self._bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary"""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": round(self.max, 3),
+            "buckets": dict(
+                zip([f"<={bound}" for bound in self._bounds] + ["inf"], self.buckets)
+            ),
+        }
+
+
+class NullMetrics:
+    """Metrics recording turned off, every hook does nothing."""
+
+    enabled = False
+
+    def sent(self, nbytes: int) -> None:
+        """Bytes written."""
+
+    def received(self, nbytes: int) -> None:
+        """Bytes read."""
+
+    def queued(self, depth: int) -> None:
+        """Commands waiting for an answer."""
+
+    def answered(self, buffers: Sequence[Union[str, bytes]], elapsed: float) -> None:
+        """Commands answered after elapsed seconds."""
+
+    def retried(self, reason: str) -> None:
+        """Commands sent again after authenticating or locking."""
+
+    def timed_out(self) -> None:
+        """Server did not answer in time."""
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary"""
+        return {"enabled": False}
+
+
+NULL_METRICS = NullMetrics()
+
+
+class ClientMetrics(NullMetrics):
+    """Per-command latency histograms and traffic counters."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        """Intialize."""
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.commands = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.max_queue_depth = 0
+        self.retries = {RETRY_AUTH: 0, RETRY_LOCK: 0}
+        self.timeouts = 0
+
+    def sent(self, nbytes: int) -> None:
+        """Bytes written."""
+        self.bytes_sent += nbytes
+
+    def received(self, nbytes: int) -> None:
+        """Bytes read."""
+        self.bytes_received += nbytes
+
+    def queued(self, depth: int) -> None:
+        """Commands waiting for an answer."""
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def answered(self, buffers: Sequence[Union[str, bytes]], elapsed: float) -> None:
+        """Commands answered after elapsed seconds."""
+        elapsed_ms = elapsed * 1000
+        for buffer in buffers:
+            name = command_name(buffer)
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = LatencyHistogram()
+            histogram.record(elapsed_ms)
+        self.commands += len(buffers)
+
+    def retried(self, reason: str) -> None:
+        """Commands sent again after authenticating or locking."""
+        self.retries[reason] += 1
+
+    def timed_out(self) -> None:
+        """Server did not answer in time."""
+        self.timeouts += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary"""
+        return {
+            "enabled": True,
+            "commands": self.commands,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "max_queue_depth": self.max_queue_depth,
+            "retries": dict(self.retries),
+            "timeouts": self.timeouts,
+            "latency_ms": {name: histogram.as_dict() for name, histogram in self.latency.items()},
+        }
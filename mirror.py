@@ -0,0 +1,137 @@
+"""Mirror Prismatik colors to other lights"""
+
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from homeassistant.components.light import ATTR_RGB_COLOR
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_ON
+from homeassistant.core import HomeAssistant
+
+from .frames import average_color
+from .prismatik import PrismatikClient
+
+_LOGGER = logging.getLogger(__name__)
+
+RGB = Tuple[int, int, int]
+
+
+class MirrorZone:  # pylint: disable=too-few-public-methods
+    """LEDs averaged into one color for some target lights."""
+
+    def __init__(self, leds: Sequence[int], targets: Sequence[str]) -> None:
+        """Intialize."""
+        self.leds = leds
+        self.targets = targets
+
+
+class _Forwarder:
+    """Forward colors to one light, only the latest color is kept while busy."""
+
+    def __init__(self, hass: HomeAssistant, entity_id: str, interval: float, min_delta: int) -> None:
+        """Intialize."""
+        self._hass = hass
+        self._entity_id = entity_id
+        self._interval = interval
+        self._min_delta = min_delta
+        self._latest: Optional[RGB] = None
+        self._sent: Optional[RGB] = None
+        self._wakeup = asyncio.Event()
+        self.calls = 0
+        self.skipped = 0
+
+    def submit(self, rgb: RGB) -> None:
+        """New color for the light, replaces the one not forwarded yet."""
+        if (
+            self._sent is not None
+            and max(abs(new - old) for new, old in zip(rgb, self._sent)) < self._min_delta
+        ):
+            self.skipped += 1
+            return
+        self._latest = rgb
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Forward loop, at most one service call per interval."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            rgb, self._latest = self._latest, None
+            if rgb is None:
+                continue
+            try:
+                await self._hass.services.async_call(
+                    LIGHT_DOMAIN,
+                    SERVICE_TURN_ON,
+                    {ATTR_ENTITY_ID: self._entity_id, ATTR_RGB_COLOR: list(rgb)},
+                    blocking=True,
+                )
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Could not mirror color to %s", self._entity_id)
+            else:
+                self._sent = rgb
+                self.calls += 1
+            await asyncio.sleep(self._interval)
+
+
+class PrismatikMirror:
+    """Periodically read Prismatik colors and forward zone averages to lights."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: PrismatikClient,
+        zones: Sequence[MirrorZone],
+        interval: float,
+        min_delta: int,
+    ) -> None:
+        """Intialize."""
+        self._hass = hass
+        self._client = client
+        self._interval = interval
+        self._zones = [
+            (zone.leds, [_Forwarder(hass, target, interval, min_delta) for target in zone.targets])
+            for zone in zones
+        ]
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        """Mirror status"""
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start mirroring."""
+        if self._tasks:
+            return
+        self._tasks.append(
+            self._hass.async_create_background_task(self._run(), "prismatik mirror")
+        )
+        for _, forwarders in self._zones:
+            for forwarder in forwarders:
+                self._tasks.append(
+                    self._hass.async_create_background_task(forwarder.run(), "prismatik mirror forwarder")
+                )
+
+    async def stop(self) -> None:
+        """Stop mirroring."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        """Read colors at the configured interval."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            colors = await self._client.get_colors()
+            if colors:
+                for leds, forwarders in self._zones:
+                    rgb = average_color(colors, leds)
+                    if rgb is None:
+                        continue
+                    for forwarder in forwarders:
+                        forwarder.submit(rgb)
+            await asyncio.sleep(max(self._interval - (loop.time() - started), 0))
@@ -0,0 +1,123 @@
+"""Prismatik color pipeline"""
+
+import colorsys
+from array import array
+from functools import lru_cache
+from typing import Sequence, Tuple, Union
+
+from .const import DEFAULT_GAMMA
+
+RGB = Tuple[int, int, int]
+
+
+@lru_cache(maxsize=256)
+def scale_table(level: int) -> bytes:
+    """bytes.translate() table multiplying every byte by level/255."""
+    return bytes((value * level + 127) // 255 for value in range(256))
+
+
+@lru_cache(maxsize=360)
+def _hue_table(hue: int) -> bytes:
+    """Packed full brightness (R,G,B) of a whole hue, for every whole saturation."""
+    full = [255 * channel for channel in colorsys.hsv_to_rgb(hue / 360, 1, 1)]
+    # at full brightness, channels fade linearly to white with saturation
+    return bytes(
+        round(255 - (255 - channel) * saturation / 100)
+        for saturation in range(101)
+        for channel in full
+    )
+
+
+def hs_to_rgb(hue: float, saturation: float) -> RGB:
+    """Hue (0-360) and saturation (0-100) to full brightness (R,G,B).
+
+    Looked up in tables quantized to whole degrees and percents.
+    """
+    table = _hue_table(round(hue) % 360)
+    index = min(max(round(saturation), 0), 100) * 3
+    return (table[index], table[index + 1], table[index + 2])
+
+
+# 16M possible inputs are too many for a table, colors read back repeat though
+@lru_cache(maxsize=4096)
+def rgb_to_hsv(red: int, green: int, blue: int) -> Tuple[float, float, float]:
+    """(R,G,B) to hue (0-360), saturation (0-100) and value (0-100)."""
+    hue, saturation, value = colorsys.rgb_to_hsv(red / 255, green / 255, blue / 255)
+    return (round(hue * 360, 3), round(saturation * 100, 3), round(value * 100, 3))
+
+
+def parse_balance(balance: str) -> Tuple[float, float, float]:
+    """Per-channel gains from `1,0.9,0.8`."""
+    gains = tuple(float(gain) for gain in balance.split(","))
+    if len(gains) != 3 or not all(0 <= gain <= 1 for gain in gains):
+        raise ValueError(f"Invalid white balance: {balance}")
+    return gains
+
+
+def _table(gamma: float, gain: float) -> bytes:
+    """Channel value to LED value."""
+    return bytes(round(255 * (value / 255) ** gamma * gain) for value in range(256))
+
+
+def _inverse(table: bytes) -> bytes:
+    """LED value back to the lowest channel value reaching it."""
+    inverse = bytearray(256)
+    value = 0
+    for led in range(256):
+        while value < 255 and table[value] < led:
+            value += 1
+        inverse[led] = value
+    return bytes(inverse)
+
+
+def _split(pixels: bytes, tables: Sequence[bytes]) -> bytes:
+    """Translate each channel of packed (R,G,B) with its own table."""
+    if tables[0] == tables[1] == tables[2]:
+        return pixels.translate(tables[0])
+    frame = bytearray(len(pixels))
+    for channel, table in enumerate(tables):
+        frame[channel::3] = pixels[channel::3].translate(table)
+    return bytes(frame)
+
+
+class ColorPipeline:
+    """Gamma and white balance correction through lookup tables.
+
+    Colors written to Prismatik go through correct(), colors read back
+    through uncorrect(), so Home Assistant sees the requested colors.
+    """
+
+    def __init__(
+        self,
+        gamma: float = DEFAULT_GAMMA,
+        balance: Sequence[float] = (1.0, 1.0, 1.0),
+    ) -> None:
+        """Intialize."""
+        self.settings = (gamma, tuple(balance))
+        self._tables = tuple(_table(gamma, gain) for gain in balance)
+        self._inverse = tuple(_inverse(table) for table in self._tables)
+        self.is_identity = gamma == 1 and all(gain == 1 for gain in balance)
+
+    def correct(self, rgb: Sequence[int]) -> RGB:
+        """Requested (R,G,B) to LED (R,G,B)."""
+        tables = self._tables
+        return (tables[0][rgb[0]], tables[1][rgb[1]], tables[2][rgb[2]])
+
+    def correct_frame(self, pixels: bytes) -> bytes:
+        """Requested packed (R,G,B) to LED values."""
+        if self.is_identity:
+            return pixels
+        return _split(pixels, self._tables)
+
+    def uncorrect(self, rgb: Sequence[int]) -> RGB:
+        """LED (R,G,B) read from Prismatik to requested (R,G,B)."""
+        return (self._inverse[0][rgb[0]], self._inverse[1][rgb[1]], self._inverse[2][rgb[2]])
+
+    def uncorrect_frame(self, pixels: Union[bytes, array]) -> array:
+        """LED packed (R,G,B) read from Prismatik to requested values."""
+        if self.is_identity:
+            return pixels if isinstance(pixels, array) else array("B", pixels)
+        return array("B", _split(bytes(pixels), self._inverse))
+
+
+IDENTITY = ColorPipeline()
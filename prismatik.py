@@ -2,61 +2,62 @@
 
 import asyncio
 import logging
-import re
-from enum import Enum
-from typing import Any, List, Optional, Tuple
-
-from .const import CONNECTION_RETRY_ERRORS
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+from .const import (
+    CACHE_TTL,
+    CONNECT_TIMEOUT,
+    CONNECTION_RETRY_ERRORS,
+    LATENCY_SMOOTHING,
+    READ_TIMEOUT,
+    SEND_RETRY_PASSES,
+)
+from .frames import Frame, FrameEncoder, as_buffer, changed_leds, frame_stats
+from .health import ConnectionHealth, HealthState
+from .metrics import NULL_METRICS, RETRY_AUTH, RETRY_LOCK, ClientMetrics, NullMetrics
+from .pipeline import IDENTITY, ColorPipeline
+from .protocol import (
+    AWR_AUTH_REQ,
+    AWR_HEADER,
+    AWR_NOT_LOCKED,
+    PrismatikAPI,
+    do_request,
+    get_request,
+    is_ok,
+    is_success,
+    parse_brightness,
+    parse_color,
+    parse_colors,
+    parse_leds,
+    parse_profiles,
+    parse_status,
+    parse_value,
+    set_request,
+)
+from .session import LockSession, ProfileState
+from .snapshot import PrismatikSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
-class PrismatikAPI(Enum):
-    """Prismatik API literals."""
-
-    CMD_LOCK = "lock"
-    CMD_UNLOCK = "unlock"
-
-    CMD_GET_COLOR = "colors"
-    CMD_SET_COLOR = "color"
-
-    CMD_APIKEY = "apikey"
-
-    CMD_GET_PROFILE = "profile"
-    CMD_SET_PROFILE = CMD_GET_PROFILE
-    CMD_GET_PROFILES = "profiles"
-    CMD_NEW_PROFILE = "newprofile"
-
-    CMD_GET_BRIGHTNESS = "brightness"
-    CMD_SET_BRIGHTNESS = CMD_GET_BRIGHTNESS
-
-    CMD_GET_STATUS = "status"
-    CMD_SET_STATUS = CMD_GET_STATUS
+@dataclass
+class PrismatikState:
+    """Snapshot of Prismatik server state.
 
-    CMD_GET_COUNTLEDS = "countleds"
+    color is the average of all LEDs, colors is every LED as packed R,G,B.
+    """
 
-    CMD_SET_PERSIST_ON_UNLOCK = "persistonunlock"
-
-    CMD_GET_MODE = "mode"
-    CMD_SET_MODE = CMD_GET_MODE
-
-    AWR_OK = "ok"
-    AWR_SUCCESS = "success"
-    AWR_NOT_LOCKED = "not locked"
-    AWR_AUTH_REQ = "authorization required"
-    AWR_HEADER = "Lightpack API"
-
-    STS_ON = "on"
-    STS_OFF = "off"
-
-    MOD_MOODLIGHT = "moodlight"
-
-    def __str__(self) -> str:
-        # pylint: disable=invalid-str-returned
-        return self.value
-
-    def __eq__(self, other: str) -> bool:
-        # pylint: disable=comparison-with-callable
-        return self.value == other
+    is_on: bool
+    profile: Optional[str]
+    profiles: Optional[List[str]]
+    brightness: Optional[int]
+    color: Optional[Tuple[int, int, int]]
+    leds: int
+    colors: Optional[array] = None
+    dominant_color: Optional[Tuple[int, int, int]] = None
 
 
 class PrismatikClient:
@@ -76,6 +77,23 @@ class PrismatikClient:
         self._tcpwriter = None
         self._retries = CONNECTION_RETRY_ERRORS
         self._api_connected = False
+        self._connect_lock = asyncio.Lock()
+        self._reader_task = None
+        self._outbox: List[bytes] = []
+        self._pending: Deque[asyncio.Future] = deque()
+        self._flush_scheduled = False
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._header: Optional[str] = None
+        self._encoder = FrameEncoder()
+        self._last_frame: Optional[bytes] = None
+        self._latency: Optional[float] = None
+        self._health = ConnectionHealth()
+        self._probe_task: Optional[asyncio.Task] = None
+        self._disconnect_task: Optional[asyncio.Task] = None
+        self._session = LockSession(self.unlock_now)
+        self._profile_state = ProfileState()
+        self._metrics: NullMetrics = NULL_METRICS
+        self._color_pipeline = IDENTITY
 
     def __del__(self) -> None:
         """Clean up."""
@@ -83,100 +101,280 @@ class PrismatikClient:
 
     async def _connect(self) -> bool:
         """Connect to Prismatik server."""
-        try:
-            self._tcpreader, self._tcpwriter = await asyncio.open_connection(self._host, self._port)
-        except (ConnectionRefusedError, TimeoutError, OSError):
-            if self._retries > 0:
-                self._retries -= 1
-                _LOGGER.error("Could not connect to Prismatik at %s:%s", self._host, self._port)
-            await self.disconnect()
-        else:
+        async with self._connect_lock:
+            if self._tcpwriter is not None:
+                return True
+            # fail fast while the server is known to be down
+            if not self._health.allow():
+                return False
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._port), CONNECT_TIMEOUT
+                )
+            except asyncio.CancelledError:
+                self._health.record_failure("cancelled")
+                raise
+            except (ConnectionRefusedError, asyncio.TimeoutError, OSError) as err:
+                if self._retries > 0:
+                    self._retries -= 1
+                    _LOGGER.error("Could not connect to Prismatik at %s:%s", self._host, self._port)
+                await self.disconnect()
+                self._connection_failed(f"connect: {err!r}")
+                return False
             # check header
-            data = await self._tcpreader.readline()
+            try:
+                data = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            except asyncio.CancelledError:
+                writer.close()
+                self._health.record_failure("cancelled")
+                raise
+            except (OSError, asyncio.TimeoutError):
+                data = b""
             header = data.decode().strip()
             _LOGGER.debug("GOT HEADER: %s", header)
-            if not header.startswith(str(PrismatikAPI.AWR_HEADER)):
+            if not header.startswith(AWR_HEADER):
                 _LOGGER.error("Bad API header")
-                await self.disconnect()
-        return self._tcpwriter is not None
+                writer.close()
+                self._connection_failed("bad header")
+                return False
+            self._health.record_success()
+            self._tcpreader, self._tcpwriter = reader, writer
+            # new connection, maybe a restarted server with a different setup
+            self._cache.clear()
+            self._header = header
+            self._reader_task = asyncio.create_task(self._read_loop(reader))
+        return True
+
+    def _connection_failed(self, error: str) -> None:
+        """Back off and probe the server in the background until it is back."""
+        delay = self._health.record_failure(error)
+        _LOGGER.debug("Prismatik at %s:%s unavailable, retrying in %.1fs", self._host, self._port, delay)
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe())
+
+    async def _probe(self) -> None:
+        """Reconnect once the backoff delay has expired."""
+        while self._tcpwriter is None:
+            await asyncio.sleep(self._health.retry_in)
+            if await self._connect() or self._health.state is not HealthState.OPEN:
+                return
+
+    async def close(self) -> None:
+        """Disconnect and stop trying to reconnect."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+        await self.disconnect()
 
     async def disconnect(self) -> None:
         """Disconnect from Prismatik server."""
+        writer = self._tcpwriter
+        reader_task = self._reader_task
+        self._tcpreader = None
+        self._tcpwriter = None
+        self._reader_task = None
+        self._header = None
+        self._forget_frame()
+        # the server drops the lock with the connection
+        self._session.released()
+        self._profile_state.reset()
+        self._outbox.clear()
+        self._flush_scheduled = False
+        # whatever was in flight will never be answered on this connection
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_result(None)
+        if reader_task is not None and reader_task is not asyncio.current_task():
+            reader_task.cancel()
         try:
-            if self._tcpwriter:
-                self._tcpwriter.close()
-                await self._tcpwriter.wait_closed()
+            if writer:
+                writer.close()
+                await writer.wait_closed()
         except OSError:
             return
-        finally:
-            self._tcpreader = None
-            self._tcpwriter = None
 
-    async def _send(self, buffer: str) -> Optional[str]:
-        """Send command to Prismatik server."""
-        if self._tcpwriter is None and (await self._connect()) is False:
-            return None
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        """Match incoming lines to pending commands in FIFO order."""
+        try:
+            while True:
+                data = await reader.readline()
+                if not data:
+                    raise ConnectionResetError
+                self._metrics.received(len(data))
+                answer = data.decode().strip()
+                _LOGGER.debug("RECEIVED: [%s]", answer)
+                if not self._pending:
+                    _LOGGER.debug("Unsolicited answer dropped")
+                    continue
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(answer)
+        except (OSError, ValueError):
+            if self._retries > 0:
+                self._retries -= 1
+                _LOGGER.error("Prismatik went away?")
+            await self.disconnect()
 
-        _LOGGER.debug("SENDING: [%s]", buffer.strip())
+    def _flush(self) -> None:
+        """Write every queued command in one go."""
+        self._flush_scheduled = False
+        if not self._outbox:
+            return
+        buffer = b"".join(self._outbox)
+        self._outbox.clear()
         try:
-            self._tcpwriter.write(buffer.encode())
-            await self._tcpwriter.drain()
-            await asyncio.sleep(0.01)
-            data = await self._tcpreader.readline()
-            answer = data.decode().strip()
-        except OSError:
+            self._tcpwriter.write(buffer)
+            self._metrics.sent(len(buffer))
+        except (AttributeError, OSError):
             if self._retries > 0:
                 self._retries -= 1
                 _LOGGER.error("Prismatik went away?")
+            # one disconnect is enough, later flushes may fail the same way
+            if self._disconnect_task is None or self._disconnect_task.done():
+                self._disconnect_task = asyncio.create_task(self.disconnect())
+
+    async def _pipeline(self, buffers: Sequence[Union[str, bytes]]) -> List[Optional[str]]:
+        """Queue commands and wait for their answers, no lock/auth handling."""
+        if self._tcpwriter is None and (await self._connect()) is False:
+            return [None] * len(buffers)
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for buffer in buffers:
+            _LOGGER.debug("SENDING: [%s]", buffer.strip())
+            future = loop.create_future()
+            self._outbox.append(buffer.encode() if isinstance(buffer, str) else buffer)
+            self._pending.append(future)
+            futures.append(future)
+        self._metrics.queued(len(self._pending))
+        # commands queued during the same loop iteration share a single write
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+        started = time.monotonic()
+        _, late = await asyncio.wait(futures, timeout=READ_TIMEOUT)
+        if late:
+            # answers can no longer be matched to commands, start over
+            _LOGGER.error("Prismatik did not answer in time")
+            self._metrics.timed_out()
             await self.disconnect()
-            answer = None
-        else:
+            self._connection_failed("read timeout")
+        answers = [future.result() for future in futures]
+        if any(answer is not None for answer in answers):
             self._retries = CONNECTION_RETRY_ERRORS
-            _LOGGER.debug("RECEIVED: [%s]", answer)
-            if answer == PrismatikAPI.AWR_NOT_LOCKED:
-                if await self._do_cmd(PrismatikAPI.CMD_LOCK):
-                    return await self._send(buffer)
-                _LOGGER.error("Could not lock Prismatik")
-                answer = None
-            if answer == PrismatikAPI.AWR_AUTH_REQ:
-                if self._apikey and (await self._do_cmd(PrismatikAPI.CMD_APIKEY, self._apikey)):
-                    self._api_connected = True
-                    return await self._send(buffer)
-                _LOGGER.error("Prismatik authentication failed, check API key")
-                answer = None
-            else:
+            elapsed = time.monotonic() - started
+            self._metrics.answered(buffers, elapsed)
+            self._latency = (
+                elapsed if self._latency is None
+                else self._latency + (elapsed - self._latency) * LATENCY_SMOOTHING
+            )
+        return list(answers)
+
+    async def _send_batch(self, buffers: Sequence[Union[str, bytes]]) -> List[Optional[str]]:
+        """Send commands to Prismatik server, answers are in the same order."""
+        answers = await self._pipeline(buffers)
+        for _ in range(SEND_RETRY_PASSES):
+            retry = [
+                idx for idx, answer in enumerate(answers)
+                if answer in (AWR_NOT_LOCKED, AWR_AUTH_REQ)
+            ]
+            if not retry:
+                break
+            if any(answers[idx] == AWR_AUTH_REQ for idx in retry):
+                if not self._apikey or not await self._do_cmd(PrismatikAPI.CMD_APIKEY, self._apikey):
+                    _LOGGER.error("Prismatik authentication failed, check API key")
+                    self._api_connected = False
+                    for idx in retry:
+                        answers[idx] = None
+                    return answers
                 self._api_connected = True
-        return answer
+                self._metrics.retried(RETRY_AUTH)
+            else:
+                self._metrics.retried(RETRY_LOCK)
+                # lock was lost, someone else may have changed the profile
+                self._session.released()
+                self._profile_state.reset()
+                if not await self.lock():
+                    _LOGGER.error("Could not lock Prismatik")
+                    for idx in retry:
+                        answers[idx] = None
+                    break
+            for idx, answer in zip(retry, await self._pipeline([buffers[idx] for idx in retry])):
+                answers[idx] = answer
+        if any(answer is not None and answer != AWR_AUTH_REQ for answer in answers):
+            self._api_connected = True
+        return answers
+
+    async def _send(self, buffer: Union[str, bytes]) -> Optional[str]:
+        """Send command to Prismatik server."""
+        return (await self._send_batch([buffer]))[0]
+
+    async def _send_locked(self, buffer: Union[str, bytes]) -> Optional[str]:
+        """Send command needing the API lock, locking in the same batch if needed."""
+        self._session.hold()
+        try:
+            if self._session.locked:
+                return await self._send(buffer)
+            lock, answer = await self._send_batch([do_request(PrismatikAPI.CMD_LOCK), buffer])
+            if is_success(PrismatikAPI.CMD_LOCK, lock):
+                self._session.acquired()
+            return answer
+        finally:
+            self._session.release_later()
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        """Cached value if still fresh."""
+        cached = self._cache.get(key)
+        if cached is None or time.monotonic() - cached[0] > CACHE_TTL:
+            return None
+        return cached[1]
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        """Cache value, empty values are not cached."""
+        if value:
+            self._cache[key] = (time.monotonic(), value)
+
+    def _forget_frame(self) -> None:
+        """LED colors on the server may not match the last frame anymore."""
+        self._last_frame = None
+
+    def invalidate_cache(self) -> None:
+        """Forget cached led count and profile list."""
+        self._cache.clear()
 
     async def _get_cmd(self, cmd: PrismatikAPI) -> Optional[str]:
         """Execute get-command Prismatik server."""
-        answer = await self._send(f"get{cmd}\n")
-        matches = re.compile(fr"{cmd}:(.+)").match(answer or "")
-        return matches.group(1) if matches else None
+        return parse_value(cmd, await self._send(get_request(cmd)))
+
+    async def _get_batch(self, cmds: Sequence[PrismatikAPI]) -> List[Optional[str]]:
+        """Execute several get-commands on Prismatik server in one batch."""
+        answers = await self._send_batch([get_request(cmd) for cmd in cmds])
+        return [parse_value(cmd, answer) for cmd, answer in zip(cmds, answers)]
 
     async def _set_cmd(self, cmd: PrismatikAPI, value: Any) -> bool:
         """Execute set-command Prismatik server."""
-        return await self._send(f"set{cmd}:{value}\n") == PrismatikAPI.AWR_OK
+        return is_ok(await self._send_locked(set_request(cmd, value)))
+
+    async def _set_persist(self, on_unlock: PrismatikAPI) -> bool:
+        """Keep or restore profile colors on unlock, only sent when it changes."""
+        if self._profile_state.persist == on_unlock.value:
+            return True
+        if not await self._set_cmd(PrismatikAPI.CMD_SET_PERSIST_ON_UNLOCK, on_unlock):
+            return False
+        self._profile_state.persist = on_unlock.value
+        return True
 
     async def _do_cmd(self, cmd: PrismatikAPI, value: Optional[Any] = None) -> bool:
         """Execute other command Prismatik server."""
-        value = f":{value}" if value else ""
-        answer = await self._send(f"{cmd}{value}\n")
-        return (
-            re.compile(
-                fr"^({PrismatikAPI.AWR_OK}|{cmd}:{PrismatikAPI.AWR_SUCCESS})$"
-            ).match(answer or "")
-            is not None
-        )
+        return is_success(cmd, await self._send(do_request(cmd, value)))
 
     async def _set_rgb_color(self, rgb: Tuple[int,int,int]) -> bool:
         """Generate and execude setcolor command on Prismatik server."""
         leds = await self.leds()
         if leds == 0:
             return False
-        rgb_color = ",".join(map(str, rgb))
-        pixels = ";".join([f"{led}-{rgb_color}" for led in range(1, leds + 1)])
-        return await self._set_cmd(PrismatikAPI.CMD_SET_COLOR, pixels)
+        return await self.set_frame(bytes(rgb) * leds)
 
     @property
     def is_reachable(self) -> bool:
@@ -188,6 +386,67 @@ class PrismatikClient:
         """network ok and API is talking successfully"""
         return self.is_reachable and self._api_connected
 
+    @property
+    def connection_stats(self) -> Dict[str, Any]:
+        """Connection health metrics"""
+        return {
+            **self._health.as_dict(),
+            "connected": self.is_connected,
+            "latency": self._latency,
+        }
+
+    @property
+    def color_pipeline(self) -> ColorPipeline:
+        """Color correction of written and read colors"""
+        return self._color_pipeline
+
+    def set_color_pipeline(self, pipeline: ColorPipeline) -> None:
+        """Correct colors with pipeline from now on."""
+        self._color_pipeline = pipeline
+        self._forget_frame()
+
+    @property
+    def metrics(self) -> NullMetrics:
+        """Recorded metrics, see enable_metrics()"""
+        return self._metrics
+
+    def enable_metrics(self) -> ClientMetrics:
+        """Start recording latency histograms and traffic counters."""
+        if not self._metrics.enabled:
+            self._metrics = ClientMetrics()
+        return self._metrics
+
+    @property
+    def queue_depth(self) -> int:
+        """Commands waiting for an answer"""
+        return len(self._pending)
+
+    @property
+    def lock_stats(self) -> Dict[str, Any]:
+        """API lock session state"""
+        return {
+            "locked": self._session.locked,
+            "locks": self._session.locks,
+            "unlocks": self._session.unlocks,
+        }
+
+    @property
+    def profile_state(self) -> Dict[str, Any]:
+        """Tracked profile, mode and persistonunlock"""
+        return self._profile_state.as_dict()
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Smoothed round trip time in seconds"""
+        return self._latency
+
+    @property
+    def write_buffer_size(self) -> int:
+        """Bytes queued but not sent yet"""
+        if self._tcpwriter is None:
+            return 0
+        return self._tcpwriter.transport.get_write_buffer_size() + sum(map(len, self._outbox))
+
     @property
     def host(self) -> str:
         """Host"""
@@ -198,14 +457,33 @@ class PrismatikClient:
         """Port"""
         return self._port
 
+    @property
+    def apikey(self) -> Optional[str]:
+        """API key"""
+        return self._apikey
+
+    async def set_apikey(self, apikey: Optional[str]) -> None:
+        """Change API key, reconnects to authenticate again."""
+        self._apikey = apikey
+        self._api_connected = False
+        await self.disconnect()
+
+    @property
+    def header(self) -> Optional[str]:
+        """API header (version) of the current connection"""
+        return self._header
+
     async def leds(self) -> int:
         """Return the led count of the light."""
-        countleds = await self._get_cmd(PrismatikAPI.CMD_GET_COUNTLEDS)
-        return int(countleds) if countleds else 0
+        leds = self._cache_get(str(PrismatikAPI.CMD_GET_COUNTLEDS))
+        if leds is None:
+            leds = parse_leds(await self._get_cmd(PrismatikAPI.CMD_GET_COUNTLEDS))
+            self._cache_set(str(PrismatikAPI.CMD_GET_COUNTLEDS), leds)
+        return leds
 
     async def is_on(self) -> bool:
         """ON/OFF Status."""
-        return await self._get_cmd(PrismatikAPI.CMD_GET_STATUS) == PrismatikAPI.STS_ON
+        return parse_status(await self._get_cmd(PrismatikAPI.CMD_GET_STATUS))
 
     async def turn_on(self) -> bool:
         """Turn ON."""
@@ -222,49 +500,227 @@ class PrismatikClient:
         if not profile:
             return True
         on_unlock = PrismatikAPI.STS_OFF
-        if (await self._get_cmd(PrismatikAPI.CMD_GET_PROFILE)) == profile:
+        if (self._profile_state.profile or await self.get_profile()) == profile:
             on_unlock = PrismatikAPI.STS_ON
-        return await self._set_cmd(PrismatikAPI.CMD_SET_PERSIST_ON_UNLOCK, on_unlock)
+        return await self._set_persist(on_unlock)
 
     async def get_brightness(self) -> Optional[int]:
         """Get brightness (0-100)."""
-        brightness = await self._get_cmd(PrismatikAPI.CMD_GET_BRIGHTNESS)
-        return int(brightness) if brightness is not None else None
+        return parse_brightness(await self._get_cmd(PrismatikAPI.CMD_GET_BRIGHTNESS))
+
+    async def use_profile(self, profile: str) -> bool:
+        """Switch to (new) moodlight profile whose colors persist on unlock.
+
+        Each step is only sent when the tracked state differs, so once the
+        profile is set up colors are written without any extra command.
+        """
+        state = self._profile_state
+        if state.profile != profile:
+            answer = await self._send_locked(do_request(PrismatikAPI.CMD_NEW_PROFILE, profile))
+            self.invalidate_cache()
+            self._forget_frame()
+            if not is_success(PrismatikAPI.CMD_NEW_PROFILE, answer):
+                return False
+            state.profile = profile
+            state.mode = None
+        if state.mode != PrismatikAPI.MOD_MOODLIGHT.value:
+            # no screen grabbing on top of the colors once unlocked
+            if not await self._set_cmd(PrismatikAPI.CMD_SET_MODE, PrismatikAPI.MOD_MOODLIGHT):
+                return False
+            state.mode = PrismatikAPI.MOD_MOODLIGHT.value
+        return await self._set_persist(PrismatikAPI.STS_ON)
 
     async def set_color(self, rgb: Tuple[int, int, int], profile: Optional[str]=None) -> bool:
         """Set (R,G,B) to all LEDs"""
-        if profile:
-            if not await self._do_cmd(PrismatikAPI.CMD_NEW_PROFILE, profile):
-                return False
-            if not await self._set_cmd(PrismatikAPI.CMD_SET_PERSIST_ON_UNLOCK, PrismatikAPI.STS_ON):
-                return False
+        if profile and not await self.use_profile(profile):
+            return False
         return await self._set_rgb_color(rgb)
 
+    async def set_frame(self, frame: Frame, profile: Optional[str]=None) -> bool:
+        """Set (R,G,B) of each LED, frame is packed bytes or (R,G,B) triples"""
+        if profile and not await self.use_profile(profile):
+            return False
+        leds = await self.leds()
+        if leds == 0:
+            return False
+        pixels = as_buffer(frame)[:leds * 3]
+        if not self._color_pipeline.is_identity:
+            pixels = memoryview(self._color_pipeline.correct_frame(bytes(pixels)))
+        changed = changed_leds(pixels, self._last_frame, leds)
+        if changed is not None and not changed:
+            return True
+        payload = bytes(self._encoder.encode(pixels, leds, changed))
+        # remember what was sent right away, so the next delta stays in order
+        self._last_frame = bytes(pixels)
+        if is_ok(await self._send_locked(payload)):
+            return True
+        self._last_frame = None
+        return False
+
     async def get_color(self) -> Optional[Tuple[int,int,int]]:
         """Get current (R,G,B) for the first LED"""
-        pixels = await self._get_cmd(PrismatikAPI.CMD_GET_COLOR)
-        rgb = re.match(r"^\d+-(\d+),(\d+),(\d+);", pixels or "")
-        return (int(rgb.group(1)), int(rgb.group(2)), int(rgb.group(3))) if rgb else None
+        rgb = parse_color(await self._get_cmd(PrismatikAPI.CMD_GET_COLOR))
+        return self._color_pipeline.uncorrect(rgb) if rgb is not None else None
+
+    async def get_colors(self) -> Optional[array]:
+        """Get current (R,G,B) of every LED, packed as array('B')"""
+        colors = parse_colors(await self._get_cmd(PrismatikAPI.CMD_GET_COLOR))
+        return self._color_pipeline.uncorrect_frame(colors) if colors is not None else None
+
+    async def get_summary(self) -> Tuple[Optional[str], ...]:
+        """Get raw status, profile, mode and brightness, cheap to poll for changes"""
+        summary = tuple(
+            await self._get_batch(
+                (
+                    PrismatikAPI.CMD_GET_STATUS,
+                    PrismatikAPI.CMD_GET_PROFILE,
+                    PrismatikAPI.CMD_GET_MODE,
+                    PrismatikAPI.CMD_GET_BRIGHTNESS,
+                )
+            )
+        )
+        self._profile_state.observe(summary[1], summary[2])
+        return summary
+
+    async def get_state(self) -> PrismatikState:
+        """Get status, profiles, brightness, color and led count in one batch"""
+        cmds = [
+            PrismatikAPI.CMD_GET_STATUS,
+            PrismatikAPI.CMD_GET_PROFILE,
+            PrismatikAPI.CMD_GET_BRIGHTNESS,
+            PrismatikAPI.CMD_GET_COLOR,
+        ]
+        profiles = self._cache_get(str(PrismatikAPI.CMD_GET_PROFILES))
+        if profiles is None:
+            cmds.append(PrismatikAPI.CMD_GET_PROFILES)
+        leds = self._cache_get(str(PrismatikAPI.CMD_GET_COUNTLEDS))
+        if leds is None:
+            cmds.append(PrismatikAPI.CMD_GET_COUNTLEDS)
+        values = dict(zip(map(str, cmds), await self._get_batch(cmds)))
+        if profiles is None:
+            profiles = parse_profiles(values[str(PrismatikAPI.CMD_GET_PROFILES)])
+            self._cache_set(str(PrismatikAPI.CMD_GET_PROFILES), profiles)
+        if leds is None:
+            leds = parse_leds(values[str(PrismatikAPI.CMD_GET_COUNTLEDS)])
+            self._cache_set(str(PrismatikAPI.CMD_GET_COUNTLEDS), leds)
+        colors = parse_colors(values[str(PrismatikAPI.CMD_GET_COLOR)])
+        if colors is not None:
+            colors = self._color_pipeline.uncorrect_frame(colors)
+        stats = frame_stats(colors) if colors else None
+        self._profile_state.observe(values[str(PrismatikAPI.CMD_GET_PROFILE)])
+        return PrismatikState(
+            is_on=parse_status(values[str(PrismatikAPI.CMD_GET_STATUS)]),
+            profile=values[str(PrismatikAPI.CMD_GET_PROFILE)],
+            profiles=profiles,
+            brightness=parse_brightness(values[str(PrismatikAPI.CMD_GET_BRIGHTNESS)]),
+            color=stats.average if stats else None,
+            leds=leds,
+            colors=colors,
+            dominant_color=stats.dominant if stats else None,
+        )
+
+    async def get_snapshot(self) -> Optional[PrismatikSnapshot]:
+        """Get status, profile, mode, brightness and LED colors in one batch"""
+        status, profile, mode, brightness, colors = await self._get_batch(
+            (
+                PrismatikAPI.CMD_GET_STATUS,
+                PrismatikAPI.CMD_GET_PROFILE,
+                PrismatikAPI.CMD_GET_MODE,
+                PrismatikAPI.CMD_GET_BRIGHTNESS,
+                PrismatikAPI.CMD_GET_COLOR,
+            )
+        )
+        if status is None:
+            return None
+        self._profile_state.observe(profile, mode)
+        pixels = parse_colors(colors)
+        return PrismatikSnapshot(
+            is_on=parse_status(status),
+            profile=profile,
+            mode=mode,
+            brightness=parse_brightness(brightness),
+            colors=pixels.tobytes() if pixels is not None else None,
+        )
+
+    def snapshot_requests(self, snapshot: PrismatikSnapshot) -> List[Union[str, bytes]]:
+        """Commands applying a snapshot, prepared ahead of sending them"""
+        return snapshot.requests(self._encoder)
+
+    async def restore_snapshot(
+        self,
+        snapshot: PrismatikSnapshot,
+        requests: Optional[List[Union[str, bytes]]] = None,
+    ) -> bool:
+        """Apply a snapshot with a single batch of commands"""
+        self._session.hold()
+        requests = list(requests or self.snapshot_requests(snapshot))
+        locked = self._session.locked
+        if not locked:
+            requests.insert(0, do_request(PrismatikAPI.CMD_LOCK))
+        try:
+            answers = await self._send_batch(requests)
+            if not locked:
+                if is_success(PrismatikAPI.CMD_LOCK, answers[0]):
+                    self._session.acquired()
+                answers = answers[1:]
+        finally:
+            self._session.release_later()
+        self._forget_frame()
+        self._profile_state.reset()
+        if not all(is_ok(answer) for answer in answers):
+            return False
+        state = self._profile_state
+        state.profile = snapshot.profile
+        state.mode = snapshot.mode
+        state.persist = (PrismatikAPI.STS_ON if snapshot.keeps_colors else PrismatikAPI.STS_OFF).value
+        if snapshot.colors:
+            self._last_frame = snapshot.colors
+        return True
 
     async def unlock(self) -> bool:
+        """Unlock API once no other command follows for a while"""
+        self._session.release_later()
+        return True
+
+    async def unlock_now(self) -> bool:
         """Unlock API"""
+        # Prismatik restores profile colors on unlock unless they persist
+        self._forget_frame()
+        self._session.released()
         return await self._do_cmd(PrismatikAPI.CMD_UNLOCK)
 
     async def lock(self) -> bool:
         """Lock API"""
-        return await self._do_cmd(PrismatikAPI.CMD_LOCK)
+        self._session.hold()
+        if not await self._do_cmd(PrismatikAPI.CMD_LOCK):
+            return False
+        self._session.acquired()
+        self._session.release_later()
+        return True
 
     async def get_profiles(self) -> Optional[List]:
         """Get profile list"""
-        profiles = await self._get_cmd(PrismatikAPI.CMD_GET_PROFILES)
-        return list(filter(None, profiles.split(";"))) if profiles else None
+        profiles = self._cache_get(str(PrismatikAPI.CMD_GET_PROFILES))
+        if profiles is None:
+            profiles = parse_profiles(await self._get_cmd(PrismatikAPI.CMD_GET_PROFILES))
+            self._cache_set(str(PrismatikAPI.CMD_GET_PROFILES), profiles)
+        return profiles
 
     async def get_profile(self) -> Optional[str]:
         """Get current profile name"""
-        return await self._get_cmd(PrismatikAPI.CMD_GET_PROFILE)
+        profile = await self._get_cmd(PrismatikAPI.CMD_GET_PROFILE)
+        self._profile_state.observe(profile)
+        return profile
 
     async def set_profile(self, profile: str) -> bool:
         """Set current profile name"""
-        if not await self._set_cmd(PrismatikAPI.CMD_SET_PERSIST_ON_UNLOCK, PrismatikAPI.STS_OFF):
+        if not await self._set_persist(PrismatikAPI.STS_OFF):
             return False
-        return await self._set_cmd(PrismatikAPI.CMD_SET_PROFILE, profile)
+        result = await self._set_cmd(PrismatikAPI.CMD_SET_PROFILE, profile)
+        self.invalidate_cache()
+        self._forget_frame()
+        state = self._profile_state
+        state.profile = profile if result else None
+        # the profile brings its own mode
+        state.mode = None
+        return result
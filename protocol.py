@@ -0,0 +1,172 @@
+"""Prismatik API protocol codec"""
+
+from array import array
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class PrismatikAPI(str, Enum):
+    """Prismatik API literals, they compare and hash as their plain string value."""
+
+    CMD_LOCK = "lock"
+    CMD_UNLOCK = "unlock"
+
+    CMD_GET_COLOR = "colors"
+    CMD_SET_COLOR = "color"
+
+    CMD_APIKEY = "apikey"
+
+    CMD_GET_PROFILE = "profile"
+    CMD_SET_PROFILE = CMD_GET_PROFILE
+    CMD_GET_PROFILES = "profiles"
+    CMD_NEW_PROFILE = "newprofile"
+
+    CMD_GET_BRIGHTNESS = "brightness"
+    CMD_SET_BRIGHTNESS = CMD_GET_BRIGHTNESS
+
+    CMD_GET_STATUS = "status"
+    CMD_SET_STATUS = CMD_GET_STATUS
+
+    CMD_GET_COUNTLEDS = "countleds"
+
+    CMD_SET_PERSIST_ON_UNLOCK = "persistonunlock"
+
+    CMD_GET_MODE = "mode"
+    CMD_SET_MODE = CMD_GET_MODE
+
+    AWR_OK = "ok"
+    AWR_SUCCESS = "success"
+    AWR_NOT_LOCKED = "not locked"
+    AWR_AUTH_REQ = "authorization required"
+    AWR_HEADER = "Lightpack API"
+
+    STS_ON = "on"
+    STS_OFF = "off"
+
+    MOD_MOODLIGHT = "moodlight"
+
+    def __str__(self) -> str:
+        # pylint: disable=invalid-str-returned
+        return self.value
+
+
+# plain strings, compared on every answer
+AWR_OK = PrismatikAPI.AWR_OK.value
+AWR_NOT_LOCKED = PrismatikAPI.AWR_NOT_LOCKED.value
+AWR_AUTH_REQ = PrismatikAPI.AWR_AUTH_REQ.value
+AWR_HEADER = PrismatikAPI.AWR_HEADER.value
+STS_ON = PrismatikAPI.STS_ON.value
+
+# tables built once, keyed by command literal
+_VALUE_PREFIXES: Dict[str, str] = {cmd.value: f"{cmd.value}:" for cmd in PrismatikAPI}
+_GET_REQUESTS: Dict[str, str] = {cmd.value: f"get{cmd.value}\n" for cmd in PrismatikAPI}
+_SUCCESS_ANSWERS: Dict[str, Tuple[str, str]] = {
+    cmd.value: (AWR_OK, f"{cmd.value}:{PrismatikAPI.AWR_SUCCESS.value}") for cmd in PrismatikAPI
+}
+
+_DASH = ord("-")
+_SEMICOLON = ord(";")
+_ZERO = ord("0")
+
+
+def get_request(cmd: PrismatikAPI) -> str:
+    """get-command line."""
+    return _GET_REQUESTS[cmd.value]
+
+
+def set_request(cmd: PrismatikAPI, value: Any) -> str:
+    """set-command line."""
+    return f"set{cmd.value}:{value}\n"
+
+
+def do_request(cmd: PrismatikAPI, value: Optional[Any] = None) -> str:
+    """Other command line."""
+    return f"{cmd.value}:{value}\n" if value else f"{cmd.value}\n"
+
+
+def parse_value(cmd: PrismatikAPI, answer: Optional[str]) -> Optional[str]:
+    """Value of a `key:value` answer to get-command."""
+    if not answer:
+        return None
+    prefix = _VALUE_PREFIXES[cmd.value]
+    if not answer.startswith(prefix) or len(answer) == len(prefix):
+        return None
+    return answer[len(prefix):]
+
+
+def is_ok(answer: Optional[str]) -> bool:
+    """Answer to set-command is a success."""
+    return answer == AWR_OK
+
+
+def is_success(cmd: PrismatikAPI, answer: Optional[str]) -> bool:
+    """Answer to other command is a success."""
+    return answer in _SUCCESS_ANSWERS[cmd.value]
+
+
+def parse_status(status: Optional[str]) -> bool:
+    """ON/OFF status from getstatus value."""
+    return status == STS_ON
+
+
+def parse_leds(countleds: Optional[str]) -> int:
+    """LED count from getcountleds value."""
+    return int(countleds) if countleds else 0
+
+
+def parse_brightness(brightness: Optional[str]) -> Optional[int]:
+    """Brightness (0-100) from getbrightness value."""
+    return int(brightness) if brightness is not None else None
+
+
+def parse_color(pixels: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """(R,G,B) of the first LED from getcolors value."""
+    if not pixels:
+        return None
+    first, semicolon, _ = pixels.partition(";")
+    _, dash, rgb = first.partition("-")
+    channels = rgb.split(",")
+    if not semicolon or not dash or len(channels) != 3:
+        return None
+    try:
+        red, green, blue = map(int, channels)
+    except ValueError:
+        return None
+    return (red, green, blue)
+
+
+def parse_colors(pixels: Union[str, bytes, None]) -> Optional[array]:
+    """Every LED color from getcolors value, packed as array('B') of R,G,B.
+
+    `N-R,G,B;` entries are decoded in a single pass over the bytes, without
+    splitting them into strings. LEDs are placed by their (0-based) index.
+    """
+    if not pixels:
+        return None
+    data = pixels.encode() if isinstance(pixels, str) else pixels
+    frame = array("B", bytes(data.count(_SEMICOLON) * 3))
+    value = 0
+    pos = 0
+    try:
+        for char in data:
+            if char < _ZERO:
+                # '-' ends the LED index, ',' ends a channel
+                if char == _DASH:
+                    pos = value * 3
+                else:
+                    frame[pos] = value
+                    pos += 1
+                value = 0
+            elif char == _SEMICOLON:
+                frame[pos] = value
+                value = 0
+            else:
+                value = value * 10 + char - _ZERO
+    except (IndexError, OverflowError):
+        return None
+    return frame
+
+
+def parse_profiles(profiles: Optional[str]) -> Optional[List[str]]:
+    """Profile list from getprofiles value."""
+    return list(filter(None, profiles.split(";"))) if profiles else None
@@ -0,0 +1,177 @@
+"""Prismatik client registry"""
+
+import asyncio
+import logging
+from typing import Awaitable, Dict, Optional, Set
+
+from homeassistant.core import HomeAssistant
+
+from .const import CLIENT_IDLE_TIMEOUT, DATA_REGISTRY, DOMAIN
+from .frames import FrameComposer
+from .pipeline import ColorPipeline
+from .prismatik import PrismatikClient
+from .snapshot import PrismatikSnapshot
+from .watcher import PrismatikWatcher
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Shared:  # pylint: disable=too-few-public-methods
+    """Client shared between its users."""
+
+    def __init__(self, client: PrismatikClient) -> None:
+        """Intialize."""
+        self.client = client
+        self.watcher = PrismatikWatcher(client)
+        self.composers: Dict[Optional[str], FrameComposer] = {}
+        self.snapshots: Dict[str, PrismatikSnapshot] = {}
+        self.pipeline_users = 0
+        self.refs = 0
+        self.idle_handle: Optional[asyncio.TimerHandle] = None
+
+
+class PrismatikRegistry:
+    """One authenticated client per Prismatik server (host:port).
+
+    Clients are reference counted and disconnected once unused for
+    CLIENT_IDLE_TIMEOUT seconds. Asking for a server in use with another
+    API key gets a private client, so a wrong key never breaks the users
+    of the shared one.
+    """
+
+    def __init__(self) -> None:
+        """Intialize."""
+        self._shared: Dict[str, _Shared] = {}
+        self._private: Dict[PrismatikClient, _Shared] = {}
+        # asyncio only keeps weak references to tasks
+        self._closing: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _key(host: str, port: int) -> str:
+        """Registry key."""
+        return f"{host}:{port}"
+
+    def _find(self, client: PrismatikClient) -> _Shared:
+        """Shared state of client."""
+        shared = self._shared.get(self._key(client.host, client.port))
+        if shared is not None and shared.client is client:
+            return shared
+        return self._private[client]
+
+    def _start_close(self, close: Awaitable) -> None:
+        """Close in a task kept referenced until done."""
+        task = asyncio.get_running_loop().create_task(close)
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def async_acquire(self, host: str, port: int, apikey: Optional[str]) -> PrismatikClient:
+        """Get the client for host:port, release it when done."""
+        key = self._key(host, port)
+        shared = self._shared.get(key)
+        if shared is None:
+            shared = self._shared[key] = _Shared(PrismatikClient(host, port, apikey))
+        elif shared.client.apikey != apikey:
+            if shared.refs > 0:
+                # in use with another key, leave that connection alone
+                client = PrismatikClient(host, port, apikey)
+                private = self._private[client] = _Shared(client)
+                private.refs += 1
+                return client
+            # idle connection, authenticate it with the new key
+            await shared.client.set_apikey(apikey)
+        if shared.idle_handle is not None:
+            shared.idle_handle.cancel()
+            shared.idle_handle = None
+        shared.refs += 1
+        return shared.client
+
+    def release(self, client: PrismatikClient) -> None:
+        """Done with client, disconnect it later if nobody else uses it."""
+        private = self._private.get(client)
+        if private is not None:
+            private.refs -= 1
+            if private.refs <= 0:
+                del self._private[client]
+                private.watcher.stop()
+                self._start_close(client.close())
+            return
+        key = self._key(client.host, client.port)
+        shared = self._shared.get(key)
+        if shared is None or shared.client is not client:
+            return
+        shared.refs -= 1
+        if shared.refs > 0:
+            return
+        loop = asyncio.get_running_loop()
+        shared.idle_handle = loop.call_later(
+            CLIENT_IDLE_TIMEOUT, lambda: self._start_close(self._async_close(key))
+        )
+
+    def get(self, host: str, port: int) -> Optional[PrismatikClient]:
+        """Client for host:port if someone uses it."""
+        shared = self._shared.get(self._key(host, port))
+        return shared.client if shared is not None else None
+
+    def watcher(self, client: PrismatikClient) -> PrismatikWatcher:
+        """State watcher shared by all users of client."""
+        return self._find(client).watcher
+
+    def composer(self, client: PrismatikClient, profile: Optional[str]) -> FrameComposer:
+        """Frame composer shared by all segments of client writing to profile."""
+        composers = self._find(client).composers
+        if profile not in composers:
+            composers[profile] = FrameComposer(client, profile)
+        return composers[profile]
+
+    def use_color_pipeline(self, client: PrismatikClient, pipeline: ColorPipeline) -> None:
+        """Correct colors of client, unless another user set a different correction."""
+        shared = self._find(client)
+        if shared.pipeline_users and client.color_pipeline.settings != pipeline.settings:
+            _LOGGER.warning(
+                "%s:%s already uses another gamma and white balance, keeping it",
+                client.host,
+                client.port,
+            )
+        else:
+            client.set_color_pipeline(pipeline)
+        shared.pipeline_users += 1
+
+    def release_color_pipeline(self, client: PrismatikClient) -> None:
+        """Done with the color correction of use_color_pipeline."""
+        shared = self._find(client)
+        shared.pipeline_users = max(shared.pipeline_users - 1, 0)
+
+    def snapshots(self, client: PrismatikClient) -> Dict[str, PrismatikSnapshot]:
+        """Named snapshots of client, kept in memory while it is used."""
+        return self._find(client).snapshots
+
+    async def _async_close(self, key: str) -> None:
+        """Disconnect idle client."""
+        shared = self._shared.get(key)
+        if shared is None or shared.refs > 0:
+            return
+        del self._shared[key]
+        _LOGGER.debug("Closing idle connection to %s", key)
+        shared.watcher.stop()
+        await shared.client.close()
+
+    async def async_close(self) -> None:
+        """Disconnect all clients."""
+        shared_clients = [*self._shared.values(), *self._private.values()]
+        self._shared.clear()
+        self._private.clear()
+        for shared in shared_clients:
+            if shared.idle_handle is not None:
+                shared.idle_handle.cancel()
+            shared.watcher.stop()
+            await shared.client.close()
+        # idle closes already under way
+        await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+def get_registry(hass: HomeAssistant) -> PrismatikRegistry:
+    """Prismatik client registry of this Home Assistant instance."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_REGISTRY not in data:
+        data[DATA_REGISTRY] = PrismatikRegistry()
+    return data[DATA_REGISTRY]
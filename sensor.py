@@ -0,0 +1,136 @@
+"""Prismatik client diagnostic sensors."""
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    CONF_API_KEY,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PORT,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .prismatik import PrismatikClient
+from .registry import get_registry
+
+
+class MetricSensor(NamedTuple):
+    """Client metric exposed as a sensor."""
+
+    key: str
+    name: str
+    unit: Optional[str]
+    state_class: SensorStateClass
+    value: Callable[[PrismatikClient], Any]
+
+
+def _latency(client: PrismatikClient) -> Optional[float]:
+    latency = client.latency
+    return round(latency * 1000, 2) if latency is not None else None
+
+
+METRIC_SENSORS = (
+    MetricSensor("latency", "Latency", UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT, _latency),
+    MetricSensor(
+        "queue_depth", "Queue depth", None, SensorStateClass.MEASUREMENT,
+        lambda client: client.queue_depth,
+    ),
+    MetricSensor(
+        "commands", "Commands", None, SensorStateClass.TOTAL_INCREASING,
+        lambda client: client.metrics.commands,
+    ),
+    MetricSensor(
+        "bytes_sent", "Bytes sent", UnitOfInformation.BYTES, SensorStateClass.TOTAL_INCREASING,
+        lambda client: client.metrics.bytes_sent,
+    ),
+    MetricSensor(
+        "bytes_received", "Bytes received", UnitOfInformation.BYTES, SensorStateClass.TOTAL_INCREASING,
+        lambda client: client.metrics.bytes_received,
+    ),
+    MetricSensor(
+        "reconnects", "Reconnects", None, SensorStateClass.TOTAL_INCREASING,
+        lambda client: client.connection_stats["reconnects"],
+    ),
+    MetricSensor(
+        "retries", "Retries", None, SensorStateClass.TOTAL_INCREASING,
+        lambda client: sum(client.metrics.retries.values()),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: Callable[[List[SensorEntity], bool], None],
+) -> None:
+    """Set up the Prismatik diagnostic sensors from integration."""
+    config = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(
+        [PrismatikMetricSensor(hass, config, metric) for metric in METRIC_SENSORS]
+    )
+
+
+class PrismatikMetricSensor(SensorEntity):
+    """Diagnostic sensor of the Prismatik connection, disabled by default.
+
+    Metrics are only recorded once one of these sensors is enabled, each
+    enabled sensor holds its own reference to the shared client.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: Dict[str, Any],
+        metric: MetricSensor,
+    ) -> None:
+        """Intialize."""
+        self._hass = hass
+        self._config = config
+        self._client: Optional[PrismatikClient] = None
+        self._metric = metric
+
+        host = config[CONF_HOST].replace(".", "_")
+        self._attr_unique_id = f"{host}_{config[CONF_PORT]}_{metric.key}"
+        self._attr_name = f"{config[CONF_NAME]} {metric.name}"
+        self._attr_native_unit_of_measurement = metric.unit
+        self._attr_state_class = metric.state_class
+
+    async def async_added_to_hass(self) -> None:
+        """Start recording metrics."""
+        self._client = await get_registry(self._hass).async_acquire(
+            self._config[CONF_HOST],
+            self._config[CONF_PORT],
+            self._config.get(CONF_API_KEY)
+        )
+        self._client.enable_metrics()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Done with client."""
+        if self._client is not None:
+            get_registry(self._hass).release(self._client)
+            self._client = None
+
+    @property
+    def native_value(self) -> Any:
+        """Current metric value."""
+        if self._client is None:
+            return None
+        return self._metric.value(self._client)
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Per-command latency histograms on the latency sensor."""
+        if self._metric.key != "latency" or self._client is None or not self._client.metrics.enabled:
+            return None
+        return {
+            name: {key: value for key, value in histogram.items() if key != "buckets"}
+            for name, histogram in self._client.metrics.as_dict()["latency_ms"].items()
+        }
@@ -0,0 +1,104 @@
+"""Prismatik API lock session and profile state"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .const import LOCK_IDLE_TIMEOUT
+
+
+class LockSession:
+    """Local view of the API lock, kept across bursts of commands.
+
+    Releasing is deferred until the session has been idle for a while, so
+    consecutive commands do not lock and unlock the API each time. The idle
+    timer is re-armed after every locked command, callers do not need to
+    unlock for the lock to be released.
+    """
+
+    def __init__(
+        self,
+        release: Callable[[], Awaitable],
+        idle_timeout: float = LOCK_IDLE_TIMEOUT,
+    ) -> None:
+        """Intialize."""
+        self._release = release
+        self.locked = False
+        self.locks = 0
+        self.unlocks = 0
+        self._idle_timeout = idle_timeout
+        self._release_handle: Optional[asyncio.TimerHandle] = None
+        # asyncio only keeps weak references to tasks
+        self._release_task: Optional[asyncio.Task] = None
+
+    def hold(self) -> None:
+        """Commands are coming, keep the lock."""
+        if self._release_handle is not None:
+            self._release_handle.cancel()
+            self._release_handle = None
+
+    def acquired(self) -> None:
+        """API was locked."""
+        self.locked = True
+        self.locks += 1
+
+    def release_later(self) -> None:
+        """Release once idle, unless more commands come first."""
+        self.hold()
+        if not self.locked:
+            return
+        loop = asyncio.get_running_loop()
+
+        def start_release() -> None:
+            self._release_handle = None
+            self._release_task = loop.create_task(self._release())
+
+        self._release_handle = loop.call_later(self._idle_timeout, start_release)
+
+    def released(self) -> None:
+        """API was unlocked, Prismatik may change on its own again."""
+        self.hold()
+        if self.locked:
+            self.unlocks += 1
+        self.locked = False
+
+
+class ProfileState:
+    """Local view of the active profile, its mode and persistonunlock.
+
+    Values are None until known. They are dropped on reconnect, and when
+    a read shows someone else changed the profile.
+    """
+
+    def __init__(self) -> None:
+        """Intialize."""
+        self.profile: Optional[str] = None
+        self.mode: Optional[str] = None
+        self.persist: Optional[str] = None
+        self.resyncs = 0
+
+    def reset(self) -> None:
+        """Forget everything, the server may have changed."""
+        self.profile = None
+        self.mode = None
+        self.persist = None
+
+    def observe(self, profile: Optional[str], mode: Optional[str] = None) -> None:
+        """Profile (and mode) read from the server."""
+        if profile is None:
+            return
+        if self.profile is not None and profile != self.profile:
+            # changed behind our back
+            self.reset()
+            self.resyncs += 1
+        self.profile = profile
+        if mode is not None:
+            self.mode = mode
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Tracked state"""
+        return {
+            "profile": self.profile,
+            "mode": self.mode,
+            "persist": self.persist,
+            "resyncs": self.resyncs,
+        }
@@ -0,0 +1,54 @@
+"""Prismatik device state snapshots"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+from .frames import FrameEncoder
+from .protocol import PrismatikAPI, set_request
+
+
+@dataclass(frozen=True)
+class PrismatikSnapshot:
+    """Full device state, colors are the packed (R,G,B) sent to the LEDs.
+
+    Colors are kept as read, before any color correction, so restoring
+    writes back exactly what was shown.
+    """
+
+    is_on: bool
+    profile: Optional[str]
+    mode: Optional[str]
+    brightness: Optional[int]
+    colors: Optional[bytes]
+
+    @property
+    def leds(self) -> int:
+        """LED count of the captured colors"""
+        return len(self.colors) // 3 if self.colors else 0
+
+    @property
+    def keeps_colors(self) -> bool:
+        """Colors only stay once unlocked in moodlight mode"""
+        return bool(self.colors) and self.mode == PrismatikAPI.MOD_MOODLIGHT.value
+
+    def requests(self, encoder: FrameEncoder) -> List[Union[str, bytes]]:
+        """Commands restoring the snapshot, to send in one batch while locked.
+
+        Status comes last, so the LEDs only change once everything is set.
+        Colors are shown while locked, they only persist in moodlight mode.
+        """
+        persist = PrismatikAPI.STS_ON if self.keeps_colors else PrismatikAPI.STS_OFF
+        requests: List[Union[str, bytes]] = [
+            set_request(PrismatikAPI.CMD_SET_PERSIST_ON_UNLOCK, persist)
+        ]
+        if self.profile:
+            requests.append(set_request(PrismatikAPI.CMD_SET_PROFILE, self.profile))
+        if self.mode:
+            requests.append(set_request(PrismatikAPI.CMD_SET_MODE, self.mode))
+        if self.brightness is not None:
+            requests.append(set_request(PrismatikAPI.CMD_SET_BRIGHTNESS, self.brightness))
+        if self.colors:
+            requests.append(bytes(encoder.encode(self.colors, self.leds)))
+        status = PrismatikAPI.STS_ON if self.is_on else PrismatikAPI.STS_OFF
+        requests.append(set_request(PrismatikAPI.CMD_SET_STATUS, status))
+        return requests
@@ -1,77 +1,282 @@
 #!/usr/bin/env python
 """Smol test server mimicking Prismatik"""
-import socket
+import argparse
+import asyncio
+import random
+from typing import Callable, Dict, Optional
 
 LOCAL_IP   = "127.0.0.1"
 LOCAL_PORT = 3636
 
-def welcome():
-    """prismatik api welcome message"""
-    return "Lightpack API v1.4 - Prismatik API v2.2 (type 'help' for more info)\n"
-
 LEDS = 10
-COLOR = '255,255,255'
-def getcolors():
-    """
-    getcolors
-    colors:0-5,255,1;1-1,255,9;2-1,255,22;3-1,255,35;...
-    """
-    colors = ";".join([f"{idx}-{COLOR}" for idx in range(LEDS)])
-    return f"colors:{colors};\n"
-
+COLOR = (255, 255, 255)
 STATUS = "on"
-def getstatus():
-    """
-    getstatus
-    status:on
-    """
-    return f"status:{STATUS}\n"
-
 BRIGHTNESS = 100
-def getbrightness():
-    """
-    getbrightness
-    brightness:100
-    """
-    return f"brightness:{BRIGHTNESS}\n"
-
 PROFILES = ['Lightpack','Призматик','Regnbåge']
 PROFILE_IDX = 0
-def getprofile():
-    """
-    getprofile
-    profile:hassio
-    """
-    return f"profile:{PROFILES[PROFILE_IDX]}\n"
-
-def getprofiles():
-    """
-    getprofiles
-    profiles:hassio;Lightpack;
-    """
-    return f"profiles:{';'.join(PROFILES)};\n"
-
-# print all test responses
-print(welcome(), end='')
-print(getstatus(), end='')
-print(getprofile(), end='')
-print(getprofiles(), end='')
-print(getbrightness(), end='')
-print(getcolors(), end='')
-
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-s.bind((LOCAL_IP, LOCAL_PORT))
-s.listen(4)
-client, addr = s.accept()
-client.sendall(welcome().encode())
-try:
-    while True:
-        data, addr = client.recvfrom(128*1024)
-        req = data.decode().strip()
-        resp = globals()[req]()
-        # print(resp.strip())
-        client.sendall(resp.encode())
-except: # pylint: disable=bare-except
-    pass
-finally:
-    s.close()
+
+
+class PrismatikEmulator:
+    """Prismatik server state shared by all connected clients."""
+
+    def __init__(
+        self,
+        leds: int = LEDS,
+        apikey: Optional[str] = None,
+        latency: float = 0,
+        jitter: float = 0,
+        disconnect_rate: float = 0,
+    ) -> None:
+        self.leds = leds
+        self.apikey = apikey
+        self.latency = latency
+        self.jitter = jitter
+        self.disconnect_rate = disconnect_rate
+        self.colors = bytearray(COLOR * leds)
+        self.status = STATUS
+        self.brightness = BRIGHTNESS
+        self.profiles = list(PROFILES)
+        self.profile = self.profiles[PROFILE_IDX]
+        self.mode = "ambilight"
+        self.lock_owner = None
+        self.clients = 0
+        self.commands = 0
+        self._getters: Dict[str, Callable[[], str]] = {
+            "getcolors": self.getcolors,
+            "getcountleds": self.getcountleds,
+            "getstatus": self.getstatus,
+            "getbrightness": self.getbrightness,
+            "getprofile": self.getprofile,
+            "getprofiles": self.getprofiles,
+            "getmode": self.getmode,
+        }
+        self._setters: Dict[str, Callable[[str], str]] = {
+            "setcolor": self.setcolor,
+            "setstatus": self.setstatus,
+            "setbrightness": self.setbrightness,
+            "setprofile": self.setprofile,
+            "setmode": self.setmode,
+            "setpersistonunlock": lambda value: "ok",
+        }
+
+    @staticmethod
+    def welcome():
+        """prismatik api welcome message"""
+        return "Lightpack API v1.4 - Prismatik API v2.2 (type 'help' for more info)\n"
+
+    def getcolors(self):
+        """
+        getcolors
+        colors:0-5,255,1;1-1,255,9;2-1,255,22;3-1,255,35;...
+        """
+        colors = self.colors
+        pixels = ";".join(
+            f"{idx}-{colors[idx * 3]},{colors[idx * 3 + 1]},{colors[idx * 3 + 2]}"
+            for idx in range(self.leds)
+        )
+        return f"colors:{pixels};\n"
+
+    def getcountleds(self):
+        """
+        getcountleds
+        countleds:10
+        """
+        return f"countleds:{self.leds}\n"
+
+    def getstatus(self):
+        """
+        getstatus
+        status:on
+        """
+        return f"status:{self.status}\n"
+
+    def getbrightness(self):
+        """
+        getbrightness
+        brightness:100
+        """
+        return f"brightness:{self.brightness}\n"
+
+    def getprofile(self):
+        """
+        getprofile
+        profile:hassio
+        """
+        return f"profile:{self.profile}\n"
+
+    def getprofiles(self):
+        """
+        getprofiles
+        profiles:hassio;Lightpack;
+        """
+        return f"profiles:{';'.join(self.profiles)};\n"
+
+    def getmode(self):
+        """
+        getmode
+        mode:ambilight
+        """
+        return f"mode:{self.mode}\n"
+
+    def setcolor(self, value):
+        """
+        setcolor:1-255,0,0;2-0,255,0;
+        ok
+        """
+        for pixel in filter(None, value.split(";")):
+            led, rgb = pixel.split("-")
+            offset = (int(led) - 1) * 3
+            if 0 <= offset < len(self.colors):
+                self.colors[offset:offset + 3] = bytes(map(int, rgb.split(",")))
+        return "ok"
+
+    def setstatus(self, value):
+        """
+        setstatus:off
+        ok
+        """
+        self.status = value
+        return "ok"
+
+    def setbrightness(self, value):
+        """
+        setbrightness:50
+        ok
+        """
+        self.brightness = int(value)
+        return "ok"
+
+    def setprofile(self, value):
+        """
+        setprofile:Lightpack
+        ok
+        """
+        if value not in self.profiles:
+            return "error"
+        self.profile = value
+        return "ok"
+
+    def setmode(self, value):
+        """
+        setmode:moodlight
+        ok
+        """
+        self.mode = value
+        return "ok"
+
+    def newprofile(self, value):
+        """
+        newprofile:hass
+        ok
+        """
+        if value not in self.profiles:
+            self.profiles.append(value)
+        self.profile = value
+        return "ok"
+
+    def handle(self, session: dict, req: str) -> str:
+        """Answer one request of a client session."""
+        self.commands += 1
+        cmd, _, value = req.partition(":")
+        if cmd == "apikey":
+            session["authorized"] = value == self.apikey
+            return "ok\n" if session["authorized"] else "fail\n"
+        if self.apikey and not session["authorized"]:
+            return "authorization required\n"
+        if cmd in self._getters:
+            return self._getters[cmd]()
+        if cmd == "lock":
+            if self.lock_owner not in (None, session["id"]):
+                return "lock:busy\n"
+            self.lock_owner = session["id"]
+            return "lock:success\n"
+        if cmd == "unlock":
+            if self.lock_owner != session["id"]:
+                return "unlock:not locked\n"
+            self.lock_owner = None
+            return "unlock:success\n"
+        if cmd in self._setters or cmd == "newprofile":
+            if self.lock_owner != session["id"]:
+                return "not locked\n"
+            if cmd == "newprofile":
+                return f"{self.newprofile(value)}\n"
+            return f"{self._setters[cmd](value)}\n"
+        return "unknown command\n"
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Client connection."""
+        self.clients += 1
+        session = {"id": object(), "authorized": False}
+        writer.write(self.welcome().encode())
+        loop = asyncio.get_running_loop()
+        due = 0.0
+        try:
+            # commands may arrive pipelined, answer them line by line
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if self.disconnect_rate and random.random() < self.disconnect_rate:
+                    break
+                answer = self.handle(session, line.decode().strip()).encode()
+                delay = self.latency + random.uniform(0, self.jitter)
+                if delay <= 0:
+                    writer.write(answer)
+                    continue
+                # network delay: answers are late but keep their order
+                due = max(loop.time() + delay, due)
+                loop.call_at(due, writer.write, answer)
+        except ConnectionError:
+            pass
+        finally:
+            if self.lock_owner is session["id"]:
+                self.lock_owner = None
+            self.clients -= 1
+            writer.close()
+
+    async def start(self, host: str = LOCAL_IP, port: int = LOCAL_PORT) -> asyncio.AbstractServer:
+        """Listen for clients."""
+        return await asyncio.start_server(self.serve_client, host, port, reuse_address=True)
+
+
+async def main():
+    """Run the emulator until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default=LOCAL_IP)
+    parser.add_argument("--port", type=int, default=LOCAL_PORT)
+    parser.add_argument("--leds", type=int, default=LEDS)
+    parser.add_argument("--apikey", default=None)
+    parser.add_argument("--latency", type=float, default=0, help="answer delay in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random extra delay in ms")
+    parser.add_argument(
+        "--disconnect-rate", type=float, default=0,
+        help="probability to drop the client on each command",
+    )
+    args = parser.parse_args()
+
+    emulator = PrismatikEmulator(
+        leds=args.leds,
+        apikey=args.apikey,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        disconnect_rate=args.disconnect_rate,
+    )
+    # print all test responses
+    print(emulator.welcome(), end='')
+    print(emulator.getstatus(), end='')
+    print(emulator.getprofile(), end='')
+    print(emulator.getprofiles(), end='')
+    print(emulator.getbrightness(), end='')
+    print(emulator.getcolors(), end='')
+    print(emulator.getcountleds(), end='', flush=True)
+
+    server = await emulator.start(args.host, args.port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,53 @@
+"""Prismatik client-side transitions"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, Sequence, Tuple
+
+from .const import TRANSITION_LATENCY_FACTOR, TRANSITION_MAX_STEP, TRANSITION_MIN_STEP
+
+
+def interpolate(start: float, end: float, progress: float) -> float:
+    """Linear interpolation."""
+    return start + (end - start) * progress
+
+
+def interpolate_hs(
+    start: Sequence[float],
+    end: Sequence[float],
+    progress: float,
+) -> Tuple[float, float]:
+    """Hue/saturation interpolation, hue goes the short way around."""
+    hue_delta = (end[0] - start[0] + 180) % 360 - 180
+    return ((start[0] + hue_delta * progress) % 360, interpolate(start[1], end[1], progress))
+
+
+def step_interval(latency: Optional[float]) -> float:
+    """Time between transition steps for the measured round trip latency."""
+    if latency is None:
+        return TRANSITION_MIN_STEP
+    return min(max(latency * TRANSITION_LATENCY_FACTOR, TRANSITION_MIN_STEP), TRANSITION_MAX_STEP)
+
+
+async def run_transition(
+    duration: float,
+    step: Callable[[float], Awaitable[Any]],
+    latency: Callable[[], Optional[float]],
+) -> None:
+    """Call step with progress (0-1] until duration has elapsed.
+
+    Steps are scheduled on the loop's monotonic clock, a slow step makes
+    the next one jump ahead rather than stretch the transition.
+    The step rate follows the measured latency of the connection.
+    Cancel the awaiting task to abort the transition.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    end = start + max(duration, 0)
+    while True:
+        next_step = min(loop.time() + step_interval(latency()), end)
+        await asyncio.sleep(max(next_step - loop.time(), 0))
+        now = loop.time()
+        progress = min((now - start) / duration, 1) if now < end else 1
+        await step(progress)
+        if progress >= 1:
+            return
@@ -0,0 +1,107 @@
+"""Prismatik state watcher"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional
+
+from .const import WATCH_BACKOFF, WATCH_MAX_INTERVAL, WATCH_MIN_INTERVAL
+from .prismatik import PrismatikClient, PrismatikState
+
+_LOGGER = logging.getLogger(__name__)
+
+StateListener = Callable[[PrismatikState], None]
+
+
+class PrismatikWatcher:
+    """Sample Prismatik cheaply and notify listeners when its state changes.
+
+    The sampling interval shrinks after a change and grows while idle.
+    """
+
+    def __init__(self, client: PrismatikClient) -> None:
+        """Intialize."""
+        self._client = client
+        self._listeners: List[StateListener] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._interval = WATCH_MIN_INTERVAL
+        self._sample = None
+        self._available: Optional[bool] = None
+        self._refreshed = 0.0
+        self._force_refresh = True
+        self.state: Optional[PrismatikState] = None
+
+    @property
+    def interval(self) -> float:
+        """Current sampling interval"""
+        return self._interval
+
+    def add_listener(self, listener: StateListener) -> Callable[[], None]:
+        """Listen to state changes, returns a callable to stop listening."""
+        self._listeners.append(listener)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+            if not self._listeners:
+                self.stop()
+
+        return remove_listener
+
+    def stop(self) -> None:
+        """Stop watching."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def refresh(self) -> None:
+        """Fetch full state on next sample, sooner rather than later."""
+        self._force_refresh = True
+        self._interval = WATCH_MIN_INTERVAL
+        self._wakeup.set()
+
+    async def async_refresh(self) -> Optional[PrismatikState]:
+        """Fetch full state now and notify listeners if it changed."""
+        self._force_refresh = False
+        self._refreshed = time.monotonic()
+        state = await self._client.get_state()
+        available = self._client.is_connected
+        changed = state != self.state or available != self._available
+        self.state = state
+        self._available = available
+        if changed:
+            for listener in list(self._listeners):
+                listener(state)
+        return state
+
+    async def _watch_once(self) -> bool:
+        """Sample and refresh if needed, returns True if something changed."""
+        sample = await self._client.get_summary()
+        stale = time.monotonic() - self._refreshed >= WATCH_MAX_INTERVAL
+        if sample == self._sample and not stale and not self._force_refresh:
+            return False
+        self._sample = sample
+        previous = self.state
+        return (await self.async_refresh()) != previous
+
+    async def _run(self) -> None:
+        """Watch loop."""
+        while True:
+            self._wakeup.clear()
+            try:
+                changed = await self._watch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error while watching Prismatik state")
+                changed = False
+            if changed:
+                self._interval = WATCH_MIN_INTERVAL
+            else:
+                self._interval = min(self._interval * WATCH_BACKOFF, WATCH_MAX_INTERVAL)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass